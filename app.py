@@ -1,44 +1,20 @@
 import streamlit as st
+import hmac
+import logging
 import os
 import uuid
 import urllib.parse
 from groq import Groq
-import datetime
-
-def get_tax_filing_context():
-    """
-    Calculates the tax filing status dynamically based on today's date.
-    Works for any year.
-    """
-    today = datetime.date.today()
-    current_year = today.year
-    
-    # Context: We are assuming the user wants to file for the IMMEDIATE PAST Financial Year (FY)
-    # Example: In Dec 2025, we are filing for FY 2024-25 (AY 2025-26)
-    
-    # If today is Jan-Mar, we are still in the previous calendar year's cycle logic roughly
-    # But let's simplify for standard filing cycle (April to March)
-    
-    # Target Assessment Year (AY) is usually Current Year + 1 (if currently in FY)
-    # But usually users ask about the COMPLETED FY.
-    # Let's target the "Relevant AY" which ends on March 31 of next year.
-    
-    # Logic for the MOST RECENT completed FY:
-    relevant_ay_end_year = current_year + 1 if today.month > 3 else current_year
-    deadline_normal = datetime.date(current_year, 7, 31)
-    deadline_belated = datetime.date(current_year, 12, 31)
-    
-    status_msg = ""
-    
-    # Check Status for IMMEDIATE PAST YEAR
-    if today <= deadline_normal:
-        status_msg = f"Current Status: **Normal Filing Window** (Ends July 31, {current_year}). No Penalty."
-    elif today <= deadline_belated:
-        status_msg = f"Current Status: **Belated Filing Window** (Ends Dec 31, {current_year}). Penalty: ₹1,000 (if Income < ₹5L) or ₹5,000."
-    else:
-        status_msg = f"Current Status: **Window Closed**. Only ITR-U (Updated Return) is possible."
-        
-    return f"Today is {today.strftime('%B %d, %Y')}. {status_msg}"
+import loan_calculator
+import stamp_duty
+import tax_engine
+import state_store
+import load_shedding
+import fallback_answers
+from knowledge_base import (
+    ROLE_CA, ROLE_LAWYER, STRUCTURE_CA, STRUCTURE_COMPACT, STRUCTURE_GENERAL,
+)
+from prompt_compiler import compile_system_prompt, language_instruction, property_system_prompt, with_tax_context
 
 # --- 1. CONFIGURATION ---
 st.set_page_config(
@@ -158,286 +134,52 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 3. LOGIC ENGINE ---
+logger = logging.getLogger(__name__)
 client = Groq(api_key=os.environ.get("GROQ_API_KEY") or st.secrets["GROQ_API_KEY"])
 
-# >>> UPDATED KNOWLEDGE BASE <<<
-KNOWLEDGE_BASE = """
-[ROLE]
-- You are 'Clear Hai', an expert Indian Legal Consultant.
-- JURISDICTION: INDIA ONLY.
-- You are 'Pocket Lawyer', India's most aggressive and strategic AI Legal Assistant.
-- Your goal is NOT just to inform, but to PROTECT and ATTACK legally.
-- JURISDICTION: INDIA ONLY (Cite BNS 2023, RBI Circulars, IT Act).
-[INSTRUCTION: HOW TO ANSWER]
-- Do NOT give generic advice ("File a complaint").
-- GIVE ACTIONABLE TOOLS: Templates, Step-by-Step Timelines, and Exact Legal Sections.
-- Structure your answer with bold headers.
-[TOPIC: RENT AGREEMENTS & LEASES]
-- **Core Myth Buster:** There is NO legal rule mandating an 11-month period.
-  - *Reality:* People choose 11 months to avoid "Mandatory Registration" under Section 17 of the Registration Act, 1908 (required only for leases of 12 months or more).
-- **Registration Rule:** - < 12 Months: Notarized is enough (Optional Registration).
-  - 12+ Months: MUST be Registered at Sub-Registrar office.
-- **Applicable Laws (State Specific):**
-  - NEVER cite a "Central Rent Control Act". Rent is a STATE subject.
-  - Maharashtra: Maharashtra Rent Control Act, 1999.
-  - Delhi: Delhi Rent Control Act, 1958.
-  - **Model Tenancy Act 2021:** This is ADVISORY only. It is NOT law unless the specific state has notified it.
-- **Security Deposit:** - No central limit. Depends on State Act or Contract. 
-  - (e.g., Model Act suggests 2 months, but this is not binding in all states yet).
-[CRITICAL LEGAL RULES]
-1. **Loan Default & Criminal Law (BNS vs NI Act)**:
-   - **CORE RULE**: Loan default is CIVIL, not CRIMINAL. Police cannot arrest you for simple non-payment.
-   - **BNS Clarification**: 
-     - **BNS Section 138** = Abduction (Kidnapping). 
-     - **NI Act Section 138** = Cheque Bounce.
-     - *Warning*: If an agent cites "BNS 138" for a loan, they are using intimidation tactics. Clarify this distinction to the user immediately.
-   - **Remedy**: File complaint on **RBI CMS Portal** (cms.rbi.org.in) for harassment. Do not suggest Banking Ombudsman for criminal threats.
-   - **Bail**: If a Cheque Bounce case (NI Act 138) is filed, it is bailable.
-4. **Tone**:
-   - Empathetic but fierce. "Don't panic, here is your weapon."
-2. **Tax Demand (Section 143(1))**:
-   - Primary Remedy: Rectification u/s 154.
-   - Secondary: Condonation u/s 119(2)(b).
-
-3. **Property Disputes**:
-   - Never advise suing for black money. 
-   - Use "Cancellation of Sale Deed" for fraud/wrong description cases.
-2. **Merchandise & IP Rights (F1/Fan Gear)**:
-   - **NO "Loopholes"**: Do NOT use the word "loophole". Use "Lawful Alternatives".
-   - **Passing Off**: Even without a registered trademark, if a design confuses a buyer into thinking it's "Official Merchandise", it is illegal Passing Off.
-   - **Parody/Fair Dealing**: Does NOT apply to commercial sale of goods (T-shirts/Posters). Commercial gain negates fair dealing defense in India.
-   - **Strategy**: Use generic art styles. Avoid official logos, sponsor names, and likeness rights (faces of drivers).
-[TOPIC: RECOVERY AGENT HARASSMENT]
-- Violation: Refusing to identify the Agency/Bank violates RBI 'Fair Practices Code'.
-- Complaint Forums: 
-  1. RBI CMS Portal (cms.rbi.org.in).
-  2. TRAI DND (1909).
-  (Note: National Consumer Helpline is advisory only).
-1. **Inheritance (Son's Claim)**:
-   - **Hindu Law (Hindu Succession Act, 1956)**: Son is a **Class I Heir**.
-   - **Ancestral Property**: Son has a birthright (Coparcener). Father CANNOT exclude son via Will.
-   - **Self-Acquired Property**: Father has 100% control. If Father leaves a valid **Will** giving property to someone else, Son gets NOTHING. Son only inherits if Father dies "Intestate" (without a Will).
-   - **Daughters**: Have equal rights as sons (2005 Amendment).
-   - **Muslim Law**: Son is a residuary/sharer. Testamentary succession (Will) is limited to 1/3rd of property.
-   - **Christian/Parsi**: Governed by Indian Succession Act, 1925.
-[TOPIC: DEC 2025 TAX ALERTS]
-- 'Significant Mismatch' Notices: Deadline Dec 31, 2025.
-- Action: Submit feedback on Compliance Portal. Do NOT revise blindly.
-5. **Year-End Delivery Scams (AI Phishing)**:
-   - **Trigger:** Messages about "Delivery Failed," "Update Address," or "Customs Duty" for packages.
-   - **Red Flags:** Short links (bit.ly), requests for small payments (₹5) to "release" package.
-   - **Verdict:** SCAM. Do not click.
-   - You are 'Pocket Lawyer', an Expert Indian Tax Consultant.
-- JURISDICTION: INDIA (Income Tax Act, 1961).
-[TIMELINE RULES]
-    1. **Normal Return (u/s 139(1))**: Allowed until July 31 of Assessment Year. (No Penalty).
-    2. **Belated Return (u/s 139(4))**: Allowed until Dec 31 of Assessment Year. (Penalty u/s 234F applies).
-    3. **Updated Return (ITR-U u/s 139(8A))**: Allowed within 24 months after AY ends. (Requires Additional Tax).
-    
-    [CRITICAL WARNING]
-    - If the user asks about filing for "Last Year", check the provided [CURRENT CONTEXT].
-    - If context says "Window Closed", user MUST file ITR-U.
-    - ITR-U often fails if Tax Payable is Zero (Income < 5L).
-
-[CRITICAL TAX RULES: MONEY TRANSFER AGENTS]
-1. **Nature of Cash**:
-   - For a Money Transfer Agent (DMT), cash deposited in the bank is **"Pass-Through Money"** collected from customers for remittance.
-   - **Rule**: This cash is NOT "Income." Only the **Commission** earned is "Income."
-   - **Case Law**: Cite *CIT vs. Datta X-Ray* (Principal-Agent relationship) or general agency principles where reimbursement/remittance is not revenue.
-
-2. **The "44AD" Trap**:
-   - **Section 44AD (Presumptive Tax)** is **NOT APPLICABLE** to persons earning income via "Commission or Brokerage" (Section 44AD(6)).
-   - **Correction**: If the user is a pure commission agent, they must file normal ITR (Business & Profession) showing "Net Commission" as income, OR use Section 44ADA if they fall under "Profession" (rare for DMT).
-   - **Strategy**: Do NOT suggest 44AD unless they also have a separate trading business (e.g., Kirana store).
-
-3. **Types of "Cash Mismatch" Alerts**:
-   - **Type A: AIS/Compliance Portal Email**: This is NOT a notice. It is an "Advisory."
-     - *Action*: Submit "Feedback" on AIS Portal (Mark as "Not Income - Agent Collections").
-   - **Type B: Section 142(1)**: Preliminary Enquiry.
-     - *Action*: Submit documents (Cash Book, Agreement with Principal).
-   - **Type C: Section 143(1)(a)**: Intimation of disparity.
-     - *Action*: File "Rectification Request" u/s 154 or revise ITR.
-   - **Type D: Section 148**: Income Escaping Assessment (Serious).
-[CRITICAL TIMELINE: DEC 21, 2025 CONTEXT]
-1. **FY 2024-25 (AY 2025-26) - The "Urgent" Year**:
-   - **Context**: Due Date (July 31, 2025) has passed.
-   - **Current Status**: **Belated Return Window** (Section 139(4)).
-   - **Deadline**: **December 31, 2025** (ENDS IN 10 DAYS).
-   - **Penalty**: ₹1,000 (Section 234F) for income < ₹5 Lakhs.
-   - **Action**: File IMMEDIATELY to avoid the ITR-U trap later.
-
-2. **FY 2023-24 (AY 2024-25) - The "Missed" Year**:
-   - **Context**: Belated window closed on Dec 31, 2024.
-   - **Current Status**: **Updated Return (ITR-U)** (Section 139(8A)).
-   - **Rule**: Can be filed even if NO original return was filed.
-   - **Cost**: Tax + Interest + **25% Additional Tax**.
-   - **The "Low Income" Trap**: Legally, ITR-U is allowed for income < ₹5 Lakhs. However, practically, if your "Additional Tax Payable" is Zero, the utility may block filing. You typically need to show some small tax liability to file ITR-U validly.
-
-3. **Visa/Embassy Acceptance**:
-   - **Fact**: Embassies (US/Schengen/UK) ACCEPT "Belated Returns" (139(4)) and "Updated Returns" (139(8A)).
-   - **Key**: They look for the **Acknowledgement Number** and income consistency, not the filing section.
-
-
-[CRITICAL RULE: SOVEREIGN GOLD BONDS (SGB)]
-1. **Redemption at Maturity (The Exemption)**:
-   - **Rule**: Capital Gains arising on redemption of SGB (after 8 years) are **FULLY EXEMPT**.
-   - **Statute**: **Section 47(viic)** of Income Tax Act.
-   - **Logic**: Redemption is not regarded as a "transfer" for tax purposes.
-   - **Scope**: Applies even if bought from secondary market, provided they are held until maturity.
-
-2. **Pre-Maturity Sale (The Tax Trap)**:
-   - **Scenario**: Selling SGB on Stock Exchange (NSE/BSE) before maturity.
-   - **Tax**: Capital Gains Tax **APPLIES**. (LTCG with indexation or STCG depending on holding period).
-
-3. **Interest Income**:
-   - **Rule**: The 2.5% annual interest is **FULLY TAXABLE**.
-   - **Head**: "Income from Other Sources".
-
-4. **Process**:
-   - **Redemption**: Automatic. No application required. Money credited to bank/demat.
-   - **Action**: Do NOT draft a notice for redemption. It is system-driven.
-
-[CRITICAL RULE: PARALLEL PROCEEDINGS]
-1. **The "Refund Trap"**: 
-   - **Scenario**: User receives a Refund u/s 143(1) but has an open Notice u/s 133(6).
-   - **Verdict**: The case is NOT closed. 
-   - **Logic**: 143(1) is automated processing of declared income. 133(6) is a manual inquiry into UN-declared income. They run independently.
-   - **Risk**: The AO can still raise a demand and "claw back" the refund with interest.
-
-2. **Correct Filing Route (Post-Deadline)**:
-   - **Revised Return (139(5))**: INVALID if the deadline (31st Dec of AY) has passed or if the portal blocks it.
-   - **Defective Return (139(9))**: Do NOT confuse this with Updated Return. 139(9) is for technical errors.
-   - **Updated Return (139(8A))**: The ONLY correct path for declaring missed Crypto/VDA income now.
-     - **Mode**: MUST be filed **ONLINE** (Offline utilities often fail/show 139(9) error).
-     - **Penalty**: Taxpayer MUST pay "Additional Tax" of 25% (within 12 months) or 50% (12-24 months) on top of the tax + interest.
-
-3. **VDA (Crypto) Taxation Rules**:
-   - **Rate**: Flat 30% u/s 115BBH + 4% Cess.
-   - **Expenses**: NO deduction allowed (except cost of acquisition). Mining cost = NIL.
-   - **Set-off**: Loss from one crypto cannot be set off against profit from another.
-
-[CRITICAL TECHNICAL REALITY: E-FILING PORTAL]
-1. **Revising ITR (JSON Issue)**:
-   - **Fact**: You CANNOT import a previously filed JSON into the offline utility for revision. It will throw an error.
-   - **Fact**: You CANNOT auto-convert ITR-1 to ITR-2 via import.
-   - **The Only Method**: Start a "New Return" (Revised u/s 139(5)) -> Use "Prefill Data" -> Manually re-enter deductions/capital gains while keeping the old acknowledgement open side-by-side.
-
-2. **Foreign Assets (Schedule FA)**:
-   - **Mandate**: Residents holding ANY foreign asset (including vested RSUs/ESOPs) must file **ITR-2 or ITR-3**. ITR-1 is INVALID.
-   - **Trigger**: The High-Value Transaction (SFT) reporting from US brokers (via FATCA) alerts the IT Dept.
-   - **Reporting Rule**:
-     - **Vested RSUs**: Report as "Equity Shares" (Table A3 of Schedule FA).
-     - **Unvested RSUs**: Generally not reported until vesting (check specific plan).
-     - **Bank Accounts**: Report foreign broker cash balance (Table A1).
-   - **Penalty**: Non-disclosure attracts ₹10 Lakh penalty under **Section 43 of Black Money Act**.
-
-3. **Legal Sections**:
-   - **Revision**: Section 139(5) (Time limit: Dec 31st of Assessment Year).
-   - **Foreign Assets**: Section 139(1) Proviso.
-
-[DOCUMENTS REQUIRED]
-- **Principal Agreement**: Contract with the DMT provider (Spice Money, PayNearby, Fino, etc.).
-- **Commission Ledger**: Statement showing net earnings.
-- **Cash Book**: Daily log of "Cash In (Customer)" vs "Bank Deposit (Remittance)".
-
-[CRITICAL LEGAL RULES]
-1. **Tax Demand (Section 143(1))**:
-   - Primary Remedy: **Rectification u/s 154**. (Mistake apparent from record).
-   - Secondary: Condonation u/s 119(2)(b) (Discretionary).
-   - Writ Petition: Last resort only.
-   -"Notice Period": "Governed by Contract. Specific Performance (forcing work) is barred under Sec 14 Specific Relief Act. Section 15 of Contract Act is Coercion (not Consideration).",
-
-2. **Old Property Disputes (Builder Fraud/Wrong Deed)**:
-   - **WARNING**: Do NOT advise suing for "Unpaid Black Money". Courts will dismiss this as illegal consideration.
-   - **STRATEGY**: File Suit for **Cancellation of Sale Deed** based on FRAUD (Wrong Area/Survey No).
-   - **LIMITATION**: Suit must be filed within 3 years of *knowledge* of fraud. User must plead they discovered the discrepancy recently.
-   - **Specific Performance**: Impossible after 3 years. Do not suggest it.
-
-3. **Section 80E (Education Loan)**: 
-   - Claimant MUST be a 'Borrower' or 'Co-Borrower'. Paying EMI is NOT enough.
-
-4. **Employment Bonds**:
-   - Void u/s 27 Contract Act unless for *actual* training costs.
-[FORMATTING INSTRUCTIONS]
-- Use clean Markdown headers (###).
-- Do NOT use emojis in the legal text.
-- Provide a clear "Action Plan".
-# --- REPLACES THE OLD "NOTICE PERIOD" SECTION IN KNOWLEDGE_BASE ---
-[CRITICAL LEGAL UPDATE - EFFECTIVE JULY 1, 2024]
-1. **Status of Laws**: The IPC, CrPC, and Evidence Act are **REPEALED**.
-   - ALWAYS cite **Bharatiya Nyaya Sanhita (BNS, 2023)** for crimes.
-   - NEVER say "BNS is not in effect." It is fully active.
-
-2. **Cheating & Scams (The "420" Replacement)**:
-   - Old Law: Section 420 IPC.
-   - **New Law**: **Section 318 of BNS** (Cheating).
-   - **Application**: If a broker/landlord takes "Visiting Charges" dishonestly, cite **BNS Section 318**.
-
-3. **Visiting Charges (Specific Strategy)**:
-   - **Civil**: Unfair Trade Practice (Consumer Protection Act 2019).
-   - **Criminal**: Cheating (Section 318 BNS) if they deceive you.
-
-"Employment Notice Period": 
-[LEGAL ANALYSIS: 90-DAY NOTICE PERIOD]
-
-**1. Is a 90-Day Notice "Illegal"?**
-   - **Direct Answer:** No, it is not automatically illegal. Indian courts (e.g., *Sicpa India Ltd v. Manas Pratim Deb*) have upheld long notice periods if they are "reasonable" and "mutual" (apply to both employer and employee).
-   - **However:** It becomes illegal if it is used to "restrain trade" or forced without a buyout option.
-
-**2. The "No Forced Labour" Rule (Crucial)**
-   - **Section 14(c) of Specific Relief Act, 1963:** A contract for personal service **cannot** be specifically enforced.
-   - **Meaning:** A court cannot force you to sit in the office and work. If you resign and leave early, the company can only claim **monetary damages** (Salary for the unserved period). They cannot obtain an injunction to stop you from joining another job unless you are joining a direct competitor and sharing trade secrets.
-
-**3. The "Buyout" Clause (Your Escape Route)**
-   - Most contracts have a clause: *"90 days notice OR salary in lieu thereof."*
-   - If your contract has this, you have a **legal right** to pay the shortfall and leave. The company cannot refuse this payment to hold you hostage.
-   - **Section 74 (Indian Contract Act):** Any penalty demanded by the company must be a "reasonable estimate of loss." They cannot demand random amounts (e.g., "pay 3x salary") just to punish you.
-
-**4. "Workman" vs. "Non-Workman" Trap**
-   - **Industrial Disputes Act, 1947:** Only applies if you are a "Workman" (Technical/Clerical/Manual).
-   - **IT/Managers:** Most software engineers and managers are "Non-Workmen." You are governed purely by your **Appointment Letter** and the **Indian Contract Act**. Do not cite "Labour Court" unless you earn <₹10k or do manual work.
-
-**[ACTIONABLE STRATEGY]**
-   - **Step 1:** Check your Appointment Letter for the words "or salary in lieu thereof".
-   - **Step 2:** If the company refuses buyout, send a formal email citing **Section 14 of Specific Relief Act**, stating you are willing to pay the notice pay but cannot be forced to work.
-   - **Step 3:** Demand a detailed calculation of "training costs" if they ask for a bond repayment.
-1. **Notice Period (90 Days)**:
-   - **Legality**: Not illegal per se, but subject to "Reasonableness".
-   - **Forced Labor**: Strictly Prohibited. Under **Section 14 of Specific Relief Act**, a court CANNOT enforce "Specific Performance" of personal service (no forced work).
-   - **Buyout Option**: If contract allows "Salary in lieu of notice", denying it is illegal.
-   - **Penalty vs Compensation**: Under **Section 74 (Indian Contract Act)**, notice pay must be "reasonable compensation" for loss, not a penalty to terrorize the employee.
-   - **Jurisdiction**: 
-     - "Workman" (Blue collar/Technical): Labour Court under ID Act 1947.
-     - "Non-Workman" (Manager/Supervisor): Civil Court (Contract Act).
-   - **State Laws**: Shops & Establishments Acts vary by state (e.g., Delhi S&E Act Sec 30, Karnataka S&E Act). Do NOT cite a central "1953 Act".
-"""
+# Shared across replicas when CLEARHAI_REDIS_URL is set (chat history, answer cache, rate limits).
+store = state_store.get_backend()
+# Steps down to shorter / cached / rule-based answers when the LLM is overloaded.
+shedder = load_shedding.get_controller()
+
+# Ops view: ?metrics=<token> shows the degradation tier, cache hit rate and degraded-answer
+# counts. Disabled unless CLEARHAI_METRICS_TOKEN is set; any other value shows the normal app.
+metrics_token = os.environ.get("CLEARHAI_METRICS_TOKEN")
+requested_token = st.query_params.get("metrics")
+if metrics_token and requested_token and hmac.compare_digest(requested_token, metrics_token):
+    st.json(shedder.metrics())
+    st.stop()
+
+
+def degraded_answer(query, language, allow_rules):
+    """A near-match from the answer cache, else (if allowed) a rule-based answer. Counts the tier served."""
+    similar = store.find_similar_answer(query, language)
+    if similar is not None:
+        shedder.record_degraded(load_shedding.TIER_CACHED)
+        return fallback_answers.with_banner("a recent answer to a similar question", similar)
+    if allow_rules:
+        shedder.record_degraded(load_shedding.TIER_RULES)
+        return fallback_answers.rule_based_answer(query)
+    return None
+
 
 def get_ai_response(query, language):
-    lang_instruction = f"OUTPUT LANGUAGE: {language}. Answer ONLY in {language}."
-    if language == "Hindi" or language == "Marathi":
-        lang_instruction += " Use Devanagari script."
+    cached = store.get_cached_answer(query, language)
+    if cached is not None:
+        return cached
+    if store.hit_rate_limit(st.session_state.session_id):
+        return "⚠️ You are asking too fast. Please wait a minute and try again."
+
+    # Under load: reuse a similar cached answer, or answer from the rule engines.
+    tier = shedder.current_tier()
+    if tier >= load_shedding.TIER_CACHED:
+        answer = degraded_answer(query, language, allow_rules=tier >= load_shedding.TIER_RULES)
+        if answer is not None:
+            return answer
+    short_mode = tier >= load_shedding.TIER_SHORT
+
+    lang_instruction = language_instruction(language)
     
-    # >>> UPDATED: PROFESSIONAL STRUCTURE PROMPT <<<
-    structure_general = """
-    Format the answer strictly as follows:
-    1. **Legal Assessment**: Direct statement on legality (Is it legal/illegal?).
-    2. **Procedural Steps**: Immediate actions (e.g., Recording evidence, Blocking, Filing Complaint).
-    3. **Formal Notice Template**: A professional text draft to send to the opposing party.
-    4. **Relevant Statutes**: List specific Sections (BNS, Contract Act, RBI Guidelines).
-    5. **Escalation Protocol**: Official grievance channels (Ombudsman, Police, Consumer Forum).
-    """
-
-    # Structure B: For Tax, ITR, Visa, Crypto, SGB (The "CA" Mode)
-    # Focus: Deadlines, Calculations, Tables, Penalties.
-    structure_prompt = """
-    Format the answer strictly as follows:
-    1. **Context**: State "As of today ([Today's Date])..."
-    2. **The Verdict**: Can they file? (Yes/No).
-    3. **Action Plan**:
-       - **Current Year**: State mode (Normal/Belated) and Cost based on [CURRENT CONTEXT].
-       - **Previous Year**: State mode (Likely ITR-U) and Cost (Tax + 25%).
-    4. **Critical Warning**: Explain the ITR-U "Nil Tax" issue if relevant.
-    5. **Visa Note**: Confirm late filing is valid for Visa."""
     query_lower = query.lower()
     
     # Keywords that trigger "Tax/CA Mode"
@@ -446,28 +188,49 @@ def get_ai_response(query, language):
         "sgb", "gold bond", "deposit", "audit", "143", "notice u/s", "pan card"
     ]
     
-    # Select the right prompt
-    if any(word in query_lower for word in tax_keywords):
-        selected_structure = structure_prompt
-        system_role = "You are 'Pocket Lawyer', an Expert Chartered Accountant (CA)."
+    # Property purchase queries are computed locally; only the figures go to the LLM
+    # (no full KNOWLEDGE_BASE, so the prompt is a fraction of the size).
+    property_context = stamp_duty.build_property_context(query)
+
+    # Select the right prompt (compiled once per role/language/structure and cached)
+    if property_context:
+        system_prompt = property_system_prompt(property_context, lang_instruction)
+    elif any(word in query_lower for word in tax_keywords):
+        system_prompt = compile_system_prompt(ROLE_CA, lang_instruction, STRUCTURE_COMPACT if short_mode else STRUCTURE_CA)
+        # Slabs, rebate, surcharge, 234F, ITR-U and ITR form are computed locally.
+        tax_context = tax_engine.build_tax_context(query)
+        if tax_context:
+            system_prompt = with_tax_context(system_prompt, tax_context)
     else:
-        selected_structure = structure_general
-        system_role = "You are 'Pocket Lawyer', an Expert Indian Lawyer."
+        system_prompt = compile_system_prompt(ROLE_LAWYER, lang_instruction, STRUCTURE_COMPACT if short_mode else STRUCTURE_GENERAL)
+
+    options = {"max_tokens": load_shedding.SHORT_MAX_TOKENS} if short_mode else {}
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": f"{KNOWLEDGE_BASE}\n{lang_instruction}\n[ROLE]: {system_role}\n{selected_structure}"}, 
-                {"role": "user", "content": query}
-            ],
-            temperature=0.3
-        )
-        return completion.choices[0].message.content
-    except Exception as e:
-        # 🔴 DEBUG FIX: Show the REAL error message
-        return f"⚠️ Error: {str(e)}"
+        with shedder.track():
+            completion = client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[
+                    {"role": "system", "content": system_prompt}, 
+                    {"role": "user", "content": query}
+                ],
+                temperature=0.3,
+                **options
+            )
+        answer = completion.choices[0].message.content
+        if short_mode:
+            shedder.record_degraded(load_shedding.TIER_SHORT)
+        else:
+            # Only full answers are cached, so shortened ones are never served later as full.
+            store.cache_answer(query, language, answer)
+        return answer
+    except Exception:
+        # Groq slow / rate-limited: serve a simplified answer instead of an error.
+        logger.exception("LLM call failed; serving a simplified answer")
+        return degraded_answer(query, language, allow_rules=True)
 
 def generate_title(text):
+    if shedder.current_tier() >= load_shedding.TIER_CACHED:
+        return " ".join(text.split()[:3]) or "New Chat"
     try:
         completion = client.chat.completions.create(
             model="llama-3.1-8b-instant",
@@ -484,16 +247,81 @@ def get_whatsapp_link(response_text):
     encoded_text = urllib.parse.quote(share_text)
     return f"https://wa.me/?text={encoded_text}"
 
+# --- NEW FUNCTION: LOAN SIMULATOR (NO LLM) ---
+def render_loan_simulator():
+    with st.expander("🏦 Loan Simulator: EMI, Prepayment & FOIR", expanded=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            principal = st.number_input("Loan Amount (₹)", min_value=10000, value=3000000, step=100000)
+            rate = st.number_input("Interest Rate (% p.a.)", min_value=0.0, max_value=30.0, value=8.5, step=0.05)
+        with c2:
+            tenure_years = st.number_input("Tenure (years)", min_value=1, max_value=30, value=20)
+            prepayment = st.number_input("Prepayment (₹)", min_value=0, value=300000, step=50000)
+        with c3:
+            income = st.number_input("Net Monthly Income (₹)", min_value=0, value=100000, step=5000)
+            existing_raw = st.text_input("Existing EMIs (₹, comma separated)", value="8000, 12000")
+
+        tenure_months = int(tenure_years) * 12
+        prepay_month = st.slider("Prepay after EMI #", min_value=1, max_value=tenure_months, value=min(12, tenure_months))
+
+        emi = float(loan_calculator.calculate_emi(principal, rate, tenure_months))
+        schedule = loan_calculator.amortization_schedule(principal, rate, tenure_months)
+        st.markdown(f"**EMI:** ₹{emi:,.0f} &nbsp;|&nbsp; **Total Interest:** ₹{schedule['Interest'].sum():,.0f}")
+        st.line_chart({"Balance": schedule["Balance"], "Interest": schedule["Interest"].cumsum()})
+
+        # Rate x Tenure x Prepayment grid, computed in a single vectorized call.
+        rates = [max(rate + step, 0.0) for step in (-1.0, -0.5, 0.0, 0.5, 1.0)]
+        tenures = sorted({m for m in (tenure_months - 60, tenure_months, tenure_months + 60) if 12 <= m <= 360})
+        prepayments = sorted({0, prepayment // 2, prepayment})
+        st.caption("Prepayment: Reduce Tenure vs Reduce EMI")
+        st.dataframe(
+            loan_calculator.prepayment_scenarios(principal, rates, tenures, prepayments, prepay_month),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        try:
+            existing = [float(x) for x in existing_raw.replace("₹", "").split(",") if x.strip()]
+        except ValueError:
+            st.error("Existing EMIs must be numbers, e.g. 8000, 12000")
+            return
+        st.caption(f"FOIR if you close an existing EMI (bank limit ~{loan_calculator.DEFAULT_FOIR_LIMIT:.0%})")
+        st.dataframe(
+            loan_calculator.emi_closure_impact(income, existing, emi),
+            use_container_width=True,
+            hide_index=True,
+        )
+        max_loan = float(loan_calculator.max_eligible_loan(income, sum(existing), rate, tenure_months))
+        st.markdown(f"**Max eligible loan at current EMIs:** ₹{max_loan:,.0f}")
+
 # --- 4. SESSION ---
+# The session id lives in the URL (?sid=...), so any replica can restore the chats.
+# It is the only key to the history: a copied/shared URL exposes it (see README).
 if "chats" not in st.session_state:
-    new_id = str(uuid.uuid4())
-    st.session_state.chats = {new_id: {"title": "New Chat", "messages": []}}
-    st.session_state.current_chat_id = new_id
+    session_id = st.query_params.get("sid") or str(uuid.uuid4())
+    st.query_params["sid"] = session_id
+    st.session_state.session_id = session_id
+
+    saved = store.load_chats(session_id)
+    if saved:
+        st.session_state.chats = saved["chats"]
+        st.session_state.current_chat_id = saved["current_chat_id"]
+    else:
+        new_id = str(uuid.uuid4())
+        st.session_state.chats = {new_id: {"title": "New Chat", "messages": []}}
+        st.session_state.current_chat_id = new_id
+
+def save_session():
+    store.save_chats(st.session_state.session_id, {
+        "chats": st.session_state.chats,
+        "current_chat_id": st.session_state.current_chat_id,
+    })
 
 def create_chat():
     new_id = str(uuid.uuid4())
     st.session_state.chats[new_id] = {"title": "New Chat", "messages": []}
     st.session_state.current_chat_id = new_id
+    save_session()
 
 # --- 5. SIDEBAR ---
 with st.sidebar:
@@ -501,6 +329,8 @@ with st.sidebar:
     if st.button("➕ New chat", use_container_width=True, type="primary"):
         create_chat()
         st.rerun()
+    if shedder.current_tier() > load_shedding.TIER_NORMAL:
+        st.caption("⚡ High demand: answers may be simplified.")
     st.markdown("---")
     st.caption("Recents")
     chat_ids = list(st.session_state.chats.keys())
@@ -508,6 +338,7 @@ with st.sidebar:
         chat_data = st.session_state.chats[c_id]
         if st.button(f"💬 {chat_data['title']}", key=c_id, use_container_width=True):
             st.session_state.current_chat_id = c_id
+            save_session()
             st.rerun()
 
 # --- 6. MAIN DISPLAY ---
@@ -524,6 +355,8 @@ with col_lang:
 # DISCLAIMER
 st.warning("⚠️ Disclaimer: I am an AI Legal Assistant, not a lawyer. Use these answers to understand your rights, but consult a real advocate before going to court.")
 
+render_loan_simulator()
+
 current_id = st.session_state.current_chat_id
 current_history = st.session_state.chats[current_id]["messages"]
 
@@ -567,6 +400,7 @@ if not current_history:
                 
         st.session_state.chats[current_id]["messages"].append({"role": "assistant", "content": response})
         st.session_state.chats[current_id]["title"] = generate_title(prompt_to_run)
+        save_session()
         st.rerun()
 
 # B. CHAT HISTORY
@@ -597,7 +431,9 @@ if prompt := st.chat_input(f"Ask in {selected_language}..."):
             st.markdown(f'<a href="{wa_link}" target="_blank" class="whatsapp-btn">💬 Share on WhatsApp</a>', unsafe_allow_html=True)
     
     st.session_state.chats[current_id]["messages"].append({"role": "assistant", "content": response})
+    save_session()
     
     if len(st.session_state.chats[current_id]["messages"]) == 2:
         st.session_state.chats[current_id]["title"] = generate_title(prompt)
+        save_session()
         st.rerun()
@@ -0,0 +1,170 @@
+# ==============================================================================
+# fallback_answers.py - Deterministic Answers for Degraded Mode
+# ==============================================================================
+# When the LLM is overloaded, questions are answered from the hard-coded rules
+# instead: scam red flags, bank rules, the tax calendar and the local property
+# and tax engines. Every answer carries a "simplified answer" banner.
+
+import re
+
+import stamp_duty
+import tax_engine
+from bank_rules import BANK_RULESET, get_bank_rules
+
+SIMPLIFIED_BANNER = (
+    "ℹ️ **Simplified answer:** Our AI lawyer is under heavy load right now, so this answer "
+    "comes from {source}. Ask again in a few minutes for the full analysis.\n\n"
+)
+
+# Signals that turn an ordinary topic (a parcel, KYC, a prize) into a scam report.
+LINK_SIGNAL = r"\blinks?\b|https?://|bit\.ly|\bclick"
+PAYMENT_SIGNAL = r"\bpay(?:ing|ment)?\b|\bfee\b|\btransfer\b|\bsend\s+money\b|₹\s*\d|\brs\.?\s*\d"
+CONTACT_SIGNAL = r"\bcall(?:ed|er|s)?\b|\bsms\b|\bmessages?\b|\btext(?:ed)?\b|\bwhatsapp\b|\bemail\b"
+
+# (strong pattern, trigger pattern, signal pattern, verdict) - distilled from the
+# scam/recovery rules in KNOWLEDGE_BASE. A rule fires on its strong pattern alone,
+# or on a trigger together with a signal, all matched as whole words. Checked in
+# order: "digital arrest" must win over the recovery rule's "arrest".
+SCAM_RULES = [
+    (
+        r"\bdigital\s+arrest",
+        r"\b(?:cbi|customs|police|narcotics|trai)\s+officers?\b|\bvideo\s+call",
+        r"\barrest(?:ed)?\b|\bwarrant\b|\bmoney\b|" + PAYMENT_SIGNAL,
+        "**Verdict: SCAM.** There is no \"digital arrest\" under Indian law. No agency arrests or "
+        "collects money over a video call. Disconnect and report on 1930 / cybercrime.gov.in.",
+    ),
+    (
+        None,
+        r"\bparcels?\b|\bpackages?\b|\bdelivery\b|\bcourier\b|\bcustoms\s+duty\b",
+        LINK_SIGNAL + r"|\bupdate\s+(?:your\s+|my\s+|the\s+)?address\b|\brelease\b|₹\s*\d|\brs\.?\s*\d",
+        "**Verdict: SCAM.** Do not click. Messages about failed deliveries, address updates or "
+        "customs duty with short links (bit.ly) or small payments (₹5) to \"release\" a package are phishing.",
+    ),
+    (
+        r"\bbns\s*(?:section\s*)?138\b",
+        r"\brecovery\s+agents?\b|\barrest(?:ed)?\b|\bpolice\b",
+        r"\bloans?\b|\bemis?\b|\bdefault(?:ed)?\b|\bcredit\s+card\b|\bdues\b",
+        "**Loan default is CIVIL, not CRIMINAL.** Police cannot arrest you for simple non-payment.\n"
+        "- BNS Section 138 = Abduction. NI Act Section 138 = Cheque Bounce (bailable).\n"
+        "- Agents citing \"BNS 138\" for a loan are using intimidation.\n"
+        "- Complain on the RBI CMS Portal (cms.rbi.org.in); block calls via TRAI DND (1909).",
+    ),
+    (
+        r"\byou\s+(?:have\s+|'ve\s+)?won\b",
+        r"\blottery\b|\bkbc\b|\bprize\b|\blucky\s+draw\b",
+        "|".join([LINK_SIGNAL, PAYMENT_SIGNAL, CONTACT_SIGNAL]),
+        "**Verdict: SCAM.** A genuine prize never asks for a fee first. Do not pay; report on 1930.",
+    ),
+    (
+        r"\bshare\s+(?:your\s+|my\s+|the\s+)?(?:otp|pin|cvv)\b|\baccount\s+will\s+be\s+(?:blocked|suspended)\b",
+        r"\bkyc\b|\botp\b|\bpin\b|\bcvv\b",
+        LINK_SIGNAL + r"|\bblocked\b|\bsuspended\b|\basked\b|\basking\b|" + CONTACT_SIGNAL,
+        "**Verdict: SCAM.** Banks never ask for OTP, PIN or KYC updates through links. "
+        "Call the number on your card and report on 1930 if money was debited.",
+    ),
+]
+
+# Short names users type for the banks in BANK_RULESET.
+BANK_ALIASES = {
+    "SBI": "STATE BANK OF INDIA", "PNB": "PUNJAB NATIONAL BANK", "BOB": "BANK OF BARODA",
+    "HDFC": "HDFC BANK", "ICICI": "ICICI BANK", "AXIS": "AXIS BANK", "KOTAK": "KOTAK MAHINDRA BANK",
+    "INDUSIND": "INDUSIND BANK", "IDFC": "IDFC FIRST BANK", "CANARA": "CANARA BANK",
+}
+
+# UNIVERSAL_RULES entries that instruct the LLM rather than state a fact.
+LLM_INSTRUCTION_KEYS = {"Income_Disclaimer"}
+
+TAX_KEYWORDS = ["itr", "tax", "refund", "139", "234f", "belated", "itr-u", "crypto"]
+
+# The engines' context blocks are written for the LLM; this marker is dropped for users.
+PROMPT_ONLY_MARKER = " - USE THESE EXACT FIGURES"
+
+
+def _mentions(text, words):
+    """Whether `text` has any of `words` at the start of a word ("tax" in "taxes", not "syntax")."""
+    return any(re.search(rf"\b{re.escape(word)}", text) for word in words)
+
+
+def scam_answer(query):
+    query_lower = query.lower()
+    for strong, trigger, signal, verdict in SCAM_RULES:
+        if strong and re.search(strong, query_lower):
+            return verdict
+        if re.search(trigger, query_lower) and re.search(signal, query_lower):
+            return verdict
+    return None
+
+
+def find_bank(query):
+    upper = query.upper()
+    for name in sorted((k for k in BANK_RULESET if k != "UNIVERSAL_RULES"), key=len, reverse=True):
+        if name in upper:
+            return name
+    for alias, name in BANK_ALIASES.items():
+        if re.search(rf"\b{alias}\b", upper):
+            return name
+    return None
+
+
+def bank_answer(query):
+    bank = find_bank(query)
+    if not bank:
+        return None
+    rules = get_bank_rules(bank)
+    lines = [f"**{bank.title()} - Home Loan Rules**"]
+    lines += [
+        f"- **{key.replace('_', ' ')}:** {value}"
+        for key, value in rules.items() if key not in LLM_INSTRUCTION_KEYS
+    ]
+    lines.append("- Use the **Loan Simulator** above for exact EMI, prepayment and FOIR figures.")
+    return "\n".join(lines)
+
+
+def tax_answer(query):
+    if not _mentions(query.lower(), TAX_KEYWORDS):
+        return None
+    lines = [f"**Tax Filing Calendar:** {tax_engine.get_tax_filing_context()}"]
+    figures = tax_engine.build_tax_context(query)
+    if figures:
+        lines.append(figures.replace(PROMPT_ONLY_MARKER, ""))
+    lines += [
+        "- Normal return u/s 139(1): till July 31 of the AY, no penalty.",
+        "- Belated return u/s 139(4): till Dec 31 of the AY, fee u/s 234F (₹1,000 if income ≤ ₹5L, else ₹5,000).",
+        "- Updated return (ITR-U) u/s 139(8A): tax + interest + 25%/50%/60%/70% additional tax "
+        "(within 1/2/3/4 years of the end of the AY).",
+    ]
+    return "\n".join(lines)
+
+
+def property_answer(query):
+    figures = stamp_duty.build_property_context(query)
+    return figures.replace(PROMPT_ONLY_MARKER, "") if figures else None
+
+
+# Checked in order; the first engine that recognises the question answers it.
+ENGINES = [
+    ("our scam rules", scam_answer),
+    ("our property cost calculator", property_answer),
+    ("our tax engine and filing calendar", tax_answer),
+    ("our bank rules database", bank_answer),
+]
+
+
+def rule_based_answer(query):
+    """Always returns an answer (with banner), falling back to official help channels."""
+    for source, engine in ENGINES:
+        answer = engine(query)
+        if answer:
+            return with_banner(source, answer)
+    return with_banner(
+        "our standard guidance",
+        "We could not match your question to a ready-made rule. Meanwhile:\n"
+        "- **Cyber fraud / scams:** call 1930 or file at cybercrime.gov.in.\n"
+        "- **Bank / recovery harassment:** RBI CMS Portal (cms.rbi.org.in).\n"
+        "- **Consumer disputes:** National Consumer Helpline 1915 / e-Daakhil.\n"
+        "- **Tax notices:** respond on the Income Tax e-filing portal before the due date.",
+    )
+
+
+def with_banner(source, answer):
+    return SIMPLIFIED_BANNER.format(source=source) + answer
@@ -0,0 +1,174 @@
+# ==============================================================================
+# load_shedding.py - Adaptive Degradation Controller
+# ==============================================================================
+# Watches LLM queue depth (in-flight calls in this process), recent latency and
+# recent failures, and steps the app down as pressure rises:
+#
+#   0 normal  - full answer
+#   1 short   - smaller max_tokens + compact structure template
+#   2 cached  - near-match from the answer cache, else a short LLM answer
+#   3 rules   - near-match, else deterministic engines (no LLM call)
+#
+# Escalation is immediate; recovery is one tier at a time, once pressure is well
+# below the thresholds and the tier has held for RECOVERY_DWELL seconds. Latency
+# decays while no samples arrive and failures age out of their window, so the
+# app recovers even when tier 3 makes no LLM calls. The current tier is
+# published to the shared backend for ops.
+
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+import state_store
+
+logger = logging.getLogger(__name__)
+
+TIER_NORMAL, TIER_SHORT, TIER_CACHED, TIER_RULES = range(4)
+TIER_NAMES = {TIER_NORMAL: "normal", TIER_SHORT: "short", TIER_CACHED: "cached", TIER_RULES: "rules"}
+
+# Thresholds to enter tier 1 / 2 / 3.
+QUEUE_THRESHOLDS = (4, 8, 16)              # in-flight LLM calls in this process
+LATENCY_THRESHOLDS = (5.0, 10.0, 20.0)     # seconds, smoothed
+FAILURE_THRESHOLDS = (3, 6, 12)            # failed / rate-limited calls within FAILURE_WINDOW
+FAILURE_WINDOW = 60.0
+RECOVERY_FACTOR = 0.6                      # step down only below 60% of the tier's threshold
+RECOVERY_DWELL = 15.0                      # seconds a tier must hold before stepping down
+EWMA_ALPHA = 0.3
+LATENCY_HALF_LIFE = 30.0                   # seconds for the latency signal to halve with no samples
+PUBLISH_INTERVAL = 5.0
+METRICS_TTL = 300
+
+SHORT_MAX_TOKENS = 512
+
+
+def _tier_for(value, thresholds):
+    return sum(value >= threshold for threshold in thresholds)
+
+
+class LoadShedder:
+    def __init__(self, backend=None, replica_id=None, clock=time.monotonic):
+        self.backend = backend
+        self.replica_id = replica_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency = 0.0
+        self._last_sample = clock()
+        self._failures = deque()
+        self._tier = TIER_NORMAL
+        self._tier_since = clock()
+        self._last_publish = None
+
+    # --- Signals ---
+    def _decayed_latency(self, now):
+        return self._latency * 0.5 ** ((now - self._last_sample) / LATENCY_HALF_LIFE)
+
+    def _recent_failures(self, now):
+        while self._failures and now - self._failures[0] > FAILURE_WINDOW:
+            self._failures.popleft()
+        return len(self._failures)
+
+    def record_latency(self, seconds):
+        # Starts from zero, so one slow call moves the average only part of the way.
+        with self._lock:
+            now = self.clock()
+            self._latency = EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self._decayed_latency(now)
+            self._last_sample = now
+
+    def record_failure(self):
+        """Failures count on their own signal, so one error cannot jump tiers."""
+        with self._lock:
+            self._failures.append(self.clock())
+
+    @contextmanager
+    def track(self):
+        """Wraps one LLM call: counts it as in flight and records its latency or failure."""
+        with self._lock:
+            self._in_flight += 1
+        start = self.clock()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            self.record_latency(self.clock() - start)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    # --- Tier ---
+    def _pressure_tier(self, now, factor=1.0):
+        queue_tier = _tier_for(self._in_flight, [t * factor for t in QUEUE_THRESHOLDS])
+        latency_tier = _tier_for(self._decayed_latency(now), [t * factor for t in LATENCY_THRESHOLDS])
+        failure_tier = _tier_for(self._recent_failures(now), [t * factor for t in FAILURE_THRESHOLDS])
+        return max(queue_tier, latency_tier, failure_tier)
+
+    def current_tier(self):
+        with self._lock:
+            now = self.clock()
+            previous = self._tier
+            target = self._pressure_tier(now)
+            if target > self._tier:
+                self._tier = target
+            elif (
+                self._tier > TIER_NORMAL
+                and now - self._tier_since >= RECOVERY_DWELL
+                and self._pressure_tier(now, RECOVERY_FACTOR) < self._tier
+            ):
+                self._tier -= 1
+            if self._tier != previous:
+                self._tier_since = now
+                logger.warning("Degradation tier %s -> %s", TIER_NAMES[previous], TIER_NAMES[self._tier])
+            tier = self._tier
+            publish = self._tier != previous or self._last_publish is None or now - self._last_publish >= PUBLISH_INTERVAL
+            if publish:
+                self._last_publish = now
+        if publish:
+            self.publish()
+        return tier
+
+    # --- Metrics ---
+    def snapshot(self):
+        with self._lock:
+            now = self.clock()
+            return {
+                "replica": self.replica_id,
+                "tier": self._tier,
+                "tier_name": TIER_NAMES[self._tier],
+                "in_flight": self._in_flight,
+                "latency_ewma_s": round(self._decayed_latency(now), 3),
+                "recent_failures": self._recent_failures(now),
+                "tier_age_s": round(now - self._tier_since, 1),
+            }
+
+    def publish(self):
+        if self.backend is not None:
+            self.backend.set(f"metrics:degradation:{self.replica_id}", self.snapshot(), ttl=METRICS_TTL)
+
+    def record_degraded(self, tier):
+        """Counts an answer served in a degraded tier (shared across replicas)."""
+        if self.backend is not None and tier > TIER_NORMAL:
+            self.backend.incr(f"metrics:degraded_answers:{TIER_NAMES[tier]}")
+
+    def metrics(self):
+        """Local tier snapshot plus shared cache and degraded-answer counters."""
+        data = {"degradation": self.snapshot()}
+        if self.backend is not None:
+            data["cache"] = self.backend.cache_stats()
+            data["degraded_answers"] = {
+                TIER_NAMES[tier]: int(self.backend.get(f"metrics:degraded_answers:{TIER_NAMES[tier]}") or 0)
+                for tier in (TIER_SHORT, TIER_CACHED, TIER_RULES)
+            }
+        return data
+
+
+@lru_cache(maxsize=1)
+def get_controller():
+    """One controller per process (Streamlit re-runs app.py on every interaction)."""
+    return LoadShedder(state_store.get_backend())
@@ -0,0 +1,255 @@
+# ==============================================================================
+# load_test.py - Multi-worker Load Test for the Shared State Backend
+# ==============================================================================
+# Simulates N app workers answering a skewed stream of questions. A cache miss
+# costs one (simulated) LLM call; a hit is served from the backend.
+#
+#   shared:   all workers use one RedisBackend (a real Redis via --redis-url, or
+#             a local Redis-compatible stand-in served over multiprocessing).
+#   isolated: every worker has its own InMemoryBackend (what replicas got before).
+#
+# Usage:
+#   python load_test.py --workers 1 2 4 8 --requests 400 --llm-latency 0.05
+
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from multiprocessing.managers import BaseManager
+
+from state_store import KEY_PREFIX, InMemoryBackend, RedisBackend
+
+DISTINCT_QUESTIONS = 100
+ZIPF_EXPONENT = 1.1
+
+
+class LocalRedis:
+    """
+    Redis stand-in: the get/set(ex=, nx=)/incr/expire/delete and list subset
+    RedisBackend uses. `execute` runs a batch of commands atomically (MULTI/EXEC).
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expiry = {}
+        self._lock = threading.RLock()
+
+    def _expired(self, key):
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+            return True
+        return False
+
+    def get(self, key):
+        with self._lock:
+            return None if self._expired(key) else self._data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and not self._expired(key) and key in self._data:
+                return None
+            self._data[key] = value
+            if ex:
+                self._expiry[key] = time.time() + ex
+            else:
+                self._expiry.pop(key, None)
+        return True
+
+    def incr(self, key):
+        with self._lock:
+            self._expired(key)
+            count = int(self._data.get(key, 0)) + 1
+            self._data[key] = str(count)  # Redis stores counters as strings too
+            return count
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._expiry[key] = time.time() + seconds
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._expiry.pop(key, None)
+            return int(self._data.pop(key, None) is not None)
+
+    def _list(self, key):
+        return [] if self._expired(key) else self._data.setdefault(key, [])
+
+    def lpush(self, key, value):
+        with self._lock:
+            items = self._list(key)
+            items.insert(0, value)
+            return len(items)
+
+    def lrem(self, key, count, value):
+        # Only count=0 (remove all copies) is needed here.
+        with self._lock:
+            items = self._list(key)
+            removed = items.count(value)
+            items[:] = [item for item in items if item != value]
+            return removed
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            items = self._list(key)
+            items[:] = items[start:end + 1]
+            return True
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._list(key)
+            return items[start:] if end == -1 else items[start:end + 1]
+
+    def execute(self, commands):
+        with self._lock:
+            return [getattr(self, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class LocalPipeline:
+    """Buffers commands client-side and sends them to LocalRedis.execute in one call."""
+
+    def __init__(self, server):
+        self._server = server
+        self._commands = []
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        return self._server.execute(commands)
+
+
+class LocalRedisClient:
+    """Client for a LocalRedis proxy that adds pipeline(), like redis.Redis."""
+
+    def __init__(self, server):
+        self._server = server
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._server, name)
+
+    def pipeline(self):
+        return LocalPipeline(self._server)
+
+
+_LOCAL_REDIS = LocalRedis()
+
+
+def _local_redis():
+    return _LOCAL_REDIS
+
+
+class StandInManager(BaseManager):
+    pass
+
+
+StandInManager.register("LocalRedis", callable=_local_redis)
+
+
+def question_stream(count, seed):
+    """Zipf-skewed questions: a few popular ones, a long tail of rare ones."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank ** ZIPF_EXPONENT) for rank in range(1, DISTINCT_QUESTIONS + 1)]
+    return [f"Question #{i}" for i in rng.choices(range(DISTINCT_QUESTIONS), weights=weights, k=count)]
+
+
+def _make_backend(mode, client, redis_url, prefix):
+    if mode == "isolated":
+        return InMemoryBackend()
+    if redis_url:
+        import redis
+        client = redis.Redis.from_url(redis_url)
+    return RedisBackend(client, prefix=prefix)
+
+
+def worker(mode, client, redis_url, prefix, questions, llm_latency, results):
+    backend = _make_backend(mode, client, redis_url, prefix)
+    hits = 0
+    for question in questions:
+        if backend.get_cached_answer(question, "English") is not None:
+            hits += 1
+            continue
+        time.sleep(llm_latency)  # simulated LLM round-trip
+        backend.cache_answer(question, "English", f"Answer to {question}")
+    results.put((hits, len(questions)))
+
+
+def run(mode, workers, total_requests, llm_latency, client=None, redis_url=None, seed=7):
+    questions = question_stream(total_requests, seed)
+    prefix = f"{KEY_PREFIX}loadtest:{uuid.uuid4().hex[:8]}:"
+    results = multiprocessing.Queue()
+
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(mode, client, redis_url, prefix, questions[i::workers], llm_latency, results),
+        )
+        for i in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    counts = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    hits = sum(h for h, _ in counts)
+    served = sum(n for _, n in counts)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "requests": served,
+        "hit_rate": hits / served if served else 0.0,
+        "throughput": served / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the shared cache/session backend.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per simulated LLM call")
+    parser.add_argument("--redis-url", default=None, help="use a real Redis instead of the local stand-in")
+    args = parser.parse_args(argv)
+
+    manager, client = None, None
+    if not args.redis_url:
+        manager = StandInManager()
+        manager.start()
+        client = LocalRedisClient(manager.LocalRedis())
+
+    print(f"{'mode':<9} {'workers':>7} {'requests':>8} {'hit rate':>9} {'req/s':>8} {'speedup':>8}")
+    try:
+        for mode in ("isolated", "shared"):
+            baseline = None
+            for workers in args.workers:
+                result = run(mode, workers, args.requests, args.llm_latency, client, args.redis_url)
+                baseline = baseline or result["throughput"]
+                print(
+                    f"{result['mode']:<9} {result['workers']:>7} {result['requests']:>8} "
+                    f"{result['hit_rate']:>8.1%} {result['throughput']:>8.1f} "
+                    f"{result['throughput'] / baseline:>7.2f}x"
+                )
+    finally:
+        if manager:
+            manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
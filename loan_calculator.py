@@ -0,0 +1,179 @@
+# ==============================================================================
+# loan_calculator.py - EMI, Amortization & Prepayment Engine
+# ==============================================================================
+# Pure NumPy maths for the Loan Rejection Simulator. Every function broadcasts,
+# so a whole grid of (rate x tenure x prepayment) scenarios is computed in one
+# call without touching the LLM.
+
+import numpy as np
+
+# Banks' usual FOIR ceiling (see README: "50-60% safety limit").
+DEFAULT_FOIR_LIMIT = 0.50
+
+
+def monthly_rate(annual_rate_pct):
+    """Converts an annual rate in percent (e.g. 8.5) to a monthly fraction."""
+    return np.asarray(annual_rate_pct, dtype=float) / 1200.0
+
+
+def calculate_emi(principal, annual_rate_pct, tenure_months):
+    """
+    Standard reducing-balance EMI: P * r * (1+r)^n / ((1+r)^n - 1).
+    All arguments broadcast against each other. A 0% rate falls back to P / n.
+    """
+    p = np.asarray(principal, dtype=float)
+    r = monthly_rate(annual_rate_pct)
+    n = np.asarray(tenure_months, dtype=float)
+
+    growth = np.power(1.0 + r, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = np.where(r > 0, p * r * growth / (growth - 1.0), p / n)
+    return emi
+
+
+def outstanding_balance(principal, annual_rate_pct, emi, months_paid):
+    """Balance left after `months_paid` EMIs (closed form, broadcasts)."""
+    p = np.asarray(principal, dtype=float)
+    r = monthly_rate(annual_rate_pct)
+    e = np.asarray(emi, dtype=float)
+    k = np.asarray(months_paid, dtype=float)
+
+    growth = np.power(1.0 + r, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = np.where(r > 0, p * growth - e * (growth - 1.0) / r, p - e * k)
+    return np.maximum(balance, 0.0)
+
+
+def tenure_for_emi(principal, annual_rate_pct, emi):
+    """
+    Months needed to repay `principal` at a fixed `emi`.
+    Returns inf where the EMI does not even cover the monthly interest.
+    """
+    p = np.asarray(principal, dtype=float)
+    r = monthly_rate(annual_rate_pct)
+    e = np.asarray(emi, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = 1.0 - p * r / e
+        months = np.where(
+            r > 0,
+            np.where(ratio > 0, -np.log(np.where(ratio > 0, ratio, 1.0)) / np.log1p(r), np.inf),
+            p / e,
+        )
+    return np.where(p <= 0, 0.0, months)
+
+
+def amortization_schedule(principal, annual_rate_pct, tenure_months):
+    """
+    Full month-by-month schedule for a single loan.
+    Returns a dict of equal-length arrays, ready for st.dataframe / st.line_chart.
+    """
+    n = int(tenure_months)
+    emi = float(calculate_emi(principal, annual_rate_pct, n))
+    months = np.arange(1, n + 1)
+
+    closing = outstanding_balance(principal, annual_rate_pct, emi, months)
+    opening = np.concatenate(([float(principal)], closing[:-1]))
+    interest = opening * monthly_rate(annual_rate_pct)
+    principal_paid = opening - closing
+
+    return {
+        "Month": months,
+        "EMI": np.round(interest + principal_paid, 2),
+        "Interest": np.round(interest, 2),
+        "Principal": np.round(principal_paid, 2),
+        "Balance": np.round(closing, 2),
+    }
+
+
+def prepayment_scenarios(principal, rates_pct, tenures_months, prepayments, prepay_month=12):
+    """
+    Evaluates a full (rate x tenure x prepayment) grid in one vectorized pass.
+
+    A lump-sum prepayment is made right after EMI number `prepay_month`. For each
+    scenario both bank options are compared:
+      - "Reduce Tenure": keep the EMI, finish the loan earlier.
+      - "Reduce EMI":    keep the tenure, pay a smaller EMI.
+
+    Returns a dict of flat arrays (one row per scenario).
+    """
+    rate, tenure, prepay = np.meshgrid(
+        np.asarray(rates_pct, dtype=float),
+        np.asarray(tenures_months, dtype=float),
+        np.asarray(prepayments, dtype=float),
+        indexing="ij",
+    )
+    rate, tenure, prepay = rate.ravel(), tenure.ravel(), prepay.ravel()
+
+    p = float(principal)
+    k = np.minimum(float(prepay_month), tenure)
+    emi = calculate_emi(p, rate, tenure)
+    baseline_interest = emi * tenure - p
+
+    balance = outstanding_balance(p, rate, emi, k)
+    prepay = np.minimum(prepay, balance)
+    new_balance = balance - prepay
+    paid_so_far = emi * k
+
+    # Option A: same EMI, shorter tenure (rounded first so float noise never adds a month).
+    remaining_a = np.ceil(np.round(tenure_for_emi(new_balance, rate, emi), 6))
+    last_emi_a = outstanding_balance(new_balance, rate, emi, np.maximum(remaining_a - 1, 0))
+    last_emi_a = last_emi_a * (1.0 + monthly_rate(rate))
+    total_a = paid_so_far + prepay + emi * np.maximum(remaining_a - 1, 0) + np.where(remaining_a > 0, last_emi_a, 0.0)
+    interest_a = total_a - p
+
+    # Option B: same remaining tenure, lower EMI.
+    remaining_b = tenure - k
+    safe_remaining = np.where(remaining_b > 0, remaining_b, 1.0)
+    emi_b = np.where(remaining_b > 0, calculate_emi(new_balance, rate, safe_remaining), 0.0)
+    interest_b = paid_so_far + prepay + emi_b * remaining_b - p
+
+    return {
+        "Rate %": rate,
+        "Tenure (months)": tenure.astype(int),
+        "Prepayment": np.round(prepay, 2),
+        "EMI": np.round(emi, 2),
+        "Total Interest": np.round(baseline_interest, 2),
+        "Reduce Tenure: Months Saved": (remaining_b - remaining_a).astype(int),
+        "Reduce Tenure: Interest Saved": np.round(baseline_interest - interest_a, 2),
+        "Reduce EMI: New EMI": np.round(emi_b, 2),
+        "Reduce EMI: Interest Saved": np.round(baseline_interest - interest_b, 2),
+    }
+
+
+def foir(net_monthly_income, total_emis):
+    """Fixed Obligation to Income Ratio (fraction, broadcasts)."""
+    income = np.asarray(net_monthly_income, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(income > 0, np.asarray(total_emis, dtype=float) / income, np.inf)
+
+
+def emi_closure_impact(net_monthly_income, existing_emis, new_emi, foir_limit=DEFAULT_FOIR_LIMIT):
+    """
+    Shows what closing each existing EMI does to FOIR for the proposed loan.
+    Row 0 is "close nothing"; row i is "close existing EMI i".
+    """
+    existing = np.asarray(existing_emis, dtype=float).ravel()
+    closed = np.concatenate(([0.0], existing))
+    obligations = existing.sum() - closed + float(new_emi)
+    ratio = foir(net_monthly_income, obligations)
+
+    labels = ["Close nothing"] + [f"Close EMI #{i + 1} (₹{e:,.0f})" for i, e in enumerate(existing)]
+    return {
+        "Scenario": labels,
+        "Total EMIs": np.round(obligations, 2),
+        "FOIR %": np.round(ratio * 100.0, 2),
+        "Within Limit": ratio <= foir_limit,
+    }
+
+
+def max_eligible_loan(net_monthly_income, existing_emis_total, annual_rate_pct, tenure_months,
+                      foir_limit=DEFAULT_FOIR_LIMIT):
+    """Largest principal whose EMI still fits inside the FOIR limit (broadcasts)."""
+    capacity = np.maximum(
+        np.asarray(net_monthly_income, dtype=float) * foir_limit - np.asarray(existing_emis_total, dtype=float),
+        0.0,
+    )
+    # EMI for a principal of 1 gives the EMI-per-rupee factor.
+    per_rupee = calculate_emi(1.0, annual_rate_pct, tenure_months)
+    return capacity / per_rupee
@@ -0,0 +1,291 @@
+# ==============================================================================
+# prompt_compiler.py - Token-efficient System Prompt Assembly
+# ==============================================================================
+# Compiles KNOWLEDGE_BASE + role + language + structure template into one
+# compact system prompt:
+#   - sections with the same [HEADER] are merged,
+#   - numbered rules with the same title keep only the fullest version,
+#   - repeated lines and role/identity lines are dropped (one [ROLE] only),
+#   - Markdown emphasis, comments and indentation are stripped.
+# Also reports per-section token counts and enforces a prompt budget.
+#
+# CLI check (exits 1 when over budget):
+#   python prompt_compiler.py --budget 4000
+
+import argparse
+import datetime
+import re
+import sys
+from functools import lru_cache, partial
+
+import stamp_duty
+import tax_engine
+from knowledge_base import (
+    KNOWLEDGE_BASE, ROLE_CA, ROLE_LAWYER, ROLE_PROPERTY, STRUCTURE_CA, STRUCTURE_COMPACT, STRUCTURE_GENERAL,
+    STRUCTURE_PROPERTY,
+)
+
+# Token ceiling for the assembled system prompt (knowledge base + role + language + structure).
+PROMPT_TOKEN_BUDGET = 4000
+
+LANGUAGES = ["English", "Hindi", "Marathi"]
+DEVANAGARI_LANGUAGES = ["Hindi", "Marathi"]
+
+# Representative questions for the computed-figures blocks the budget check appends.
+SAMPLE_TAX_QUERY = "My salary is 30 lakh, crypto income of 2 lakh and RSUs abroad. Old or new regime, which ITR?"
+SAMPLE_PROPERTY_QUERY = "Stamp duty on buying a flat in Pune for 90 lakh in my wife's name?"
+SAMPLE_DATE = datetime.date(2026, 5, 1)   # inside the filing window, so every tax line is present
+
+HEADER_PATTERN = re.compile(r"^\[([^\]]+)\]\s*:?\s*$")
+ITEM_PATTERN = re.compile(r"^(\d+)\.\s+(.*)$")
+ROLE_LINE_PATTERN = re.compile(r"^-?\s*You are '")
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Lines shorter than this are never treated as a prefix-duplicate of a longer line.
+MIN_PREFIX_DEDUP_CHARS = 12
+
+
+class PromptBudgetError(Exception):
+    """Raised when an assembled prompt exceeds its token budget."""
+
+
+def count_tokens(text):
+    """
+    Approximate LLM token count: words and punctuation marks. Close to what
+    BPE tokenizers produce for this mostly-English text, with no extra dependency.
+    """
+    return len(TOKEN_PATTERN.findall(text))
+
+
+# Raw indentation at or beyond this keeps a single leading space (a sub-bullet).
+NESTED_INDENT = 5
+
+
+def indent_of(line):
+    return len(line) - len(line.lstrip())
+
+
+def normalize_line(line):
+    """Strips Markdown emphasis, comment noise and deep indentation from one line."""
+    stripped = line.strip()
+    if not stripped or stripped.startswith("# "):
+        return ""
+    stripped = stripped.replace("**", "")
+    stripped = re.sub(r"(?<!\w)\*(\S[^*]*?)\*(?!\w)", r"\1", stripped)
+    stripped = re.sub(r"\s+", " ", stripped)
+    stripped = re.sub(r":\s*- ", ": ", stripped)
+    return (" " if indent_of(line) >= NESTED_INDENT else "") + stripped
+
+
+def _dedup_key(line):
+    return re.sub(r"[^a-z0-9₹%]+", " ", line.lower()).strip()
+
+
+def parse_sections(text):
+    """
+    Splits text into [(header, [item, ...])]; an item is a list of normalized
+    lines, starting with its numbered title line (loose lines form their own item).
+    """
+    sections = [["GENERAL", [[]]]]
+    for raw in text.splitlines():
+        line = normalize_line(raw)
+        if not line:
+            continue
+        header = HEADER_PATTERN.match(line)
+        if header:
+            sections.append([header.group(1).strip().upper(), [[]]])
+            continue
+        items = sections[-1][1]
+        # Only top-level numbers start a rule; indented numbers are list entries.
+        if indent_of(raw) < 2 and ITEM_PATTERN.match(line):
+            items.append([line])
+        else:
+            items[-1].append(line)
+    return [(header, [item for item in items if item]) for header, items in sections if any(items)]
+
+
+def _item_title(item):
+    match = ITEM_PATTERN.match(item[0])
+    if not match:
+        return None
+    return _dedup_key(re.sub(r"\([^)]*\)", "", match.group(2).split(":")[0]))
+
+
+def _same_rule(title_a, title_b):
+    """Two numbered rules match when one title's words are all in the other's."""
+    if not title_a or not title_b:
+        return False
+    words_a, words_b = set(title_a.split()), set(title_b.split())
+    shorter = min(words_a, words_b, key=len)
+    return len(shorter) >= 2 and (words_a <= words_b or words_b <= words_a)
+
+
+def _dedup_lines(lines, seen):
+    """Drops lines already emitted (exactly, or as a prefix of a longer line)."""
+    kept = []
+    for line in lines:
+        key = _dedup_key(line)
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(line)
+    return [
+        line for line in kept
+        if len(_dedup_key(line)) < MIN_PREFIX_DEDUP_CHARS
+        or not any(
+            other is not line and _dedup_key(other).startswith(_dedup_key(line)) and _dedup_key(other) != _dedup_key(line)
+            for other in kept
+        )
+    ]
+
+
+def compile_sections(text=KNOWLEDGE_BASE):
+    """Returns the deduplicated [(header, body_text)] sections of the knowledge base."""
+    merged = {}
+    for header, items in parse_sections(text):
+        bucket = merged.setdefault(header, [])
+        for item in items:
+            # Identity lines conflict with the single role given at compile time.
+            item = [line for line in item if not ROLE_LINE_PATTERN.match(line)]
+            if not item:
+                continue
+            title = _item_title(item)
+            existing = next((i for i, other in enumerate(bucket) if _same_rule(title, _item_title(other))), None)
+            if existing is None:
+                bucket.append(item)
+            elif len(" ".join(item)) > len(" ".join(bucket[existing])):
+                bucket[existing] = item
+
+    compiled, seen = [], set()
+    for header, items in merged.items():
+        lines, number = [], 0
+        for item in items:
+            item_lines = _dedup_lines(item, seen)
+            if not item_lines:
+                continue
+            match = ITEM_PATTERN.match(item_lines[0])
+            if match:
+                number += 1
+                item_lines[0] = f"{number}. {match.group(2)}"
+            lines.extend(item_lines)
+        if lines:
+            compiled.append((header, "\n".join(lines)))
+    return compiled
+
+
+@lru_cache(maxsize=1)
+def compiled_knowledge_base():
+    return tuple(compile_sections(KNOWLEDGE_BASE))
+
+
+def _render(sections):
+    return "\n".join(f"[{header}]\n{body}" if header != "GENERAL" else body for header, body in sections)
+
+
+def language_instruction(language):
+    instruction = f"OUTPUT LANGUAGE: {language}. Answer ONLY in {language}."
+    if language in DEVANAGARI_LANGUAGES:
+        instruction += " Use Devanagari script."
+    return instruction
+
+
+def compact_block(text):
+    """Normalizes a free-form block (structure template, language line)."""
+    return "\n".join(line for line in (normalize_line(raw) for raw in text.splitlines()) if line)
+
+
+@lru_cache(maxsize=32)
+def compile_system_prompt(role, lang_instruction, structure):
+    """
+    Assembles the final system prompt: exactly one [ROLE], the deduplicated
+    knowledge base, the language rule and the answer structure. Cached, since
+    only a handful of (role, language, structure) combinations exist.
+    """
+    sections = compiled_knowledge_base()
+    base_role = "".join(f"\n{body}" for header, body in sections if header == "ROLE")
+    return "\n".join([
+        f"[ROLE]\n- {role}{base_role}",
+        _render([(header, body) for header, body in sections if header != "ROLE"]),
+        f"[LANGUAGE]\n{compact_block(lang_instruction)}",
+        f"[ANSWER STRUCTURE]\n{compact_block(structure)}",
+    ])
+
+
+def with_tax_context(prompt, tax_context):
+    """Appends the [COMPUTED TAX FIGURES] block to a CA prompt."""
+    return f"{prompt}\n{tax_context}\nUse the [COMPUTED TAX FIGURES] for every number. Do NOT recalculate."
+
+
+def property_system_prompt(property_context, lang_instruction):
+    """Short prompt for property purchases: the computed figures replace the knowledge base."""
+    return f"{ROLE_PROPERTY} JURISDICTION: INDIA ONLY.\n{property_context}\n{lang_instruction}\n{compact_block(STRUCTURE_PROPERTY)}"
+
+
+def _sample_tax_prompt(structure, lang_instruction):
+    tax_context = tax_engine.build_tax_context(SAMPLE_TAX_QUERY, SAMPLE_DATE)
+    return with_tax_context(compile_system_prompt(ROLE_CA, lang_instruction, structure), tax_context)
+
+
+def _sample_property_prompt(lang_instruction):
+    return property_system_prompt(stamp_duty.build_property_context(SAMPLE_PROPERTY_QUERY), lang_instruction)
+
+
+# Every prompt get_ai_response sends, by name: called with the language instruction.
+PROMPT_VARIANTS = {
+    "lawyer": partial(compile_system_prompt, ROLE_LAWYER, structure=STRUCTURE_GENERAL),
+    "lawyer-short": partial(compile_system_prompt, ROLE_LAWYER, structure=STRUCTURE_COMPACT),
+    "ca": partial(compile_system_prompt, ROLE_CA, structure=STRUCTURE_CA),
+    "ca-short": partial(compile_system_prompt, ROLE_CA, structure=STRUCTURE_COMPACT),
+    "ca+tax": partial(_sample_tax_prompt, STRUCTURE_CA),
+    "ca-short+tax": partial(_sample_tax_prompt, STRUCTURE_COMPACT),
+    "property": _sample_property_prompt,
+}
+
+
+def token_report(role, lang_instruction, structure):
+    """Per-section token counts of the compiled prompt: [(section, tokens)]."""
+    sections = compiled_knowledge_base()
+    base_role = "".join(f"\n{body}" for header, body in sections if header == "ROLE")
+    rows = [("ROLE", count_tokens(f"[ROLE]\n- {role}{base_role}"))]
+    rows += [
+        (header, count_tokens(f"[{header}]\n{body}"))
+        for header, body in sections if header != "ROLE"
+    ]
+    rows.append(("LANGUAGE", count_tokens(compact_block(lang_instruction))))
+    rows.append(("ANSWER STRUCTURE", count_tokens(compact_block(structure))))
+    return rows
+
+
+def check_budget(prompt, budget=PROMPT_TOKEN_BUDGET):
+    """Returns the prompt's token count; raises PromptBudgetError if over `budget`."""
+    tokens = count_tokens(prompt)
+    if tokens > budget:
+        raise PromptBudgetError(f"System prompt is {tokens} tokens, budget is {budget}.")
+    return tokens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report and check the compiled system prompt size.")
+    parser.add_argument("--budget", type=int, default=PROMPT_TOKEN_BUDGET)
+    args = parser.parse_args(argv)
+
+    for section, tokens in token_report(ROLE_LAWYER, language_instruction("English"), STRUCTURE_GENERAL):
+        print(f"{tokens:>6}  {section}")
+    print(f"{count_tokens(KNOWLEDGE_BASE):>6}  (raw KNOWLEDGE_BASE before compiling)")
+    print()
+
+    failed = False
+    for name, build_prompt in PROMPT_VARIANTS.items():
+        for language in LANGUAGES:
+            prompt = build_prompt(language_instruction(language))
+            try:
+                tokens = check_budget(prompt, args.budget)
+                print(f"OK    {name:<12} {language:<8} {tokens:>6} / {args.budget}")
+            except PromptBudgetError as e:
+                failed = True
+                print(f"FAIL  {name:<12} {language:<8} {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# ==============================================================================
+# query_parser.py - Pulls numbers out of free-text questions
+# ==============================================================================
+# Users write money the Indian way ("80 lakh", "1.2 Cr", "₹75,00,000", "50L").
+# The deterministic engines use these helpers to find the figures they need.
+
+import re
+
+UNIT_MULTIPLIERS = {
+    "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000, "l": 100_000,
+    "thousand": 1_000, "k": 1_000,
+    "lpa": 100_000,   # lakh per annum
+}
+
+AMOUNT_PATTERN = re.compile(
+    r"(₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(crores?|cr|lakhs?|lacs?|lpa|l|thousand|k)?\b",
+    re.IGNORECASE,
+)
+
+# Bare numbers below this are treated as section numbers, ages etc.
+MIN_BARE_AMOUNT = 1_000
+# Bare four-digit numbers in this range are read as calendar years, not rupees.
+YEAR_RANGE = range(1900, 2101)
+
+
+def parse_amounts(text):
+    """Returns every rupee amount in `text`, in order of appearance."""
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(text or ""):
+        currency, raw = match.group(1), match.group(2)
+        unit = (match.group(3) or "").lower()
+        try:
+            value = float(raw.replace(",", ""))
+        except ValueError:
+            continue
+        if unit:
+            amounts.append(value * UNIT_MULTIPLIERS[unit])
+        elif currency or "," in raw:
+            amounts.append(value)
+        elif value >= MIN_BARE_AMOUNT and int(value) not in YEAR_RANGE:
+            amounts.append(value)
+    return amounts
+
+
+def parse_amount(text):
+    """Returns the first rupee amount in `text`, or None."""
+    amounts = parse_amounts(text)
+    return amounts[0] if amounts else None
+
+
+def amounts_near(text, keywords, window=40):
+    """
+    Returns the first amount after every whole-word occurrence of `keywords`
+    within `window` characters, in order of appearance.
+    """
+    found = []
+    for match in re.finditer(r"\b(?:%s)\b" % "|".join(map(re.escape, keywords)), text or "", re.IGNORECASE):
+        amount = parse_amount(text[match.start():match.end() + window])
+        if amount is not None:
+            found.append(amount)
+    return found
+
+
+def find_amount_near(text, keywords, window=40):
+    """
+    Returns the first amount appearing within `window` characters after any of
+    `keywords` (e.g. "salary", "crypto"), or None.
+    """
+    return locate_amount_near(text, keywords, window)[0]
+
+
+def locate_amount_near(text, keywords, window=40, margin=12):
+    """
+    Like find_amount_near, but returns (amount, context): the text from just
+    before the keyword to just after the amount, for reading words such as
+    "monthly" or "per month" that qualify it. (None, "") if nothing is found.
+    """
+    text = text or ""
+    lowered = text.lower()
+    for keyword in keywords:
+        start = lowered.find(keyword)
+        if start == -1:
+            continue
+        segment = text[start:start + len(keyword) + window]
+        for match in AMOUNT_PATTERN.finditer(segment):
+            amount = parse_amount(match.group(0))
+            if amount is not None:
+                end = start + match.end()
+                return amount, text[max(start - margin, 0):end + margin]
+    return None, ""
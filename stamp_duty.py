@@ -0,0 +1,187 @@
+# ==============================================================================
+# stamp_duty.py - Deterministic Stamp Duty & Property Cost Calculator
+# ==============================================================================
+# Rates live in data/stamp_duty_rates.csv, indexed by (STATE, property_type).
+# The app computes totals here and hands only the figures to the LLM, so
+# property answers are exact and the prompt stays short.
+
+import csv
+import os
+import re
+from functools import lru_cache
+
+from query_parser import AMOUNT_PATTERN, amounts_near, parse_amount, parse_amounts
+
+RATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "stamp_duty_rates.csv")
+
+PROPERTY_TYPES = ("residential", "commercial")
+BUYER_TYPES = ("men", "women", "joint")
+
+# Cities users mention instead of the state.
+CITY_TO_STATE = {
+    "MUMBAI": "MAHARASHTRA", "PUNE": "MAHARASHTRA", "THANE": "MAHARASHTRA", "NAGPUR": "MAHARASHTRA",
+    "NEW DELHI": "DELHI",
+    "GURGAON": "HARYANA", "GURUGRAM": "HARYANA", "FARIDABAD": "HARYANA",
+    "NOIDA": "UTTAR PRADESH", "GHAZIABAD": "UTTAR PRADESH", "LUCKNOW": "UTTAR PRADESH",
+    "BANGALORE": "KARNATAKA", "BENGALURU": "KARNATAKA", "MYSORE": "KARNATAKA",
+    "CHENNAI": "TAMIL NADU", "COIMBATORE": "TAMIL NADU",
+    "HYDERABAD": "TELANGANA",
+    "KOLKATA": "WEST BENGAL",
+    "AHMEDABAD": "GUJARAT", "SURAT": "GUJARAT",
+    "JAIPUR": "RAJASTHAN",
+    "KOCHI": "KERALA", "TRIVANDRUM": "KERALA",
+    "BHOPAL": "MADHYA PRADESH", "INDORE": "MADHYA PRADESH",
+    "CHANDIGARH": "PUNJAB", "MOHALI": "PUNJAB", "LUDHIANA": "PUNJAB",
+    "PATNA": "BIHAR",
+    "VIZAG": "ANDHRA PRADESH", "VISAKHAPATNAM": "ANDHRA PRADESH", "VIJAYAWADA": "ANDHRA PRADESH",
+}
+
+PROPERTY_KEYWORDS = [
+    "stamp duty", "registration fee", "registration charge", "buy a flat", "buying a flat",
+    "buy a house", "buying a house", "property purchase", "sale deed", "buy property", "buying property",
+]
+WOMEN_KEYWORDS = ["woman", "women", "female", "wife", "mother", "daughter", "sister", "her name"]
+JOINT_KEYWORDS = ["joint", "jointly", "co-owner", "both names"]
+COMMERCIAL_KEYWORDS = ["commercial", "shop", "office space", "showroom"]
+# Words a property price follows ("a flat in Pune for 90 lakh", "worth 1.2 Cr").
+PRICE_ANCHORS = ["flat", "house", "property", "apartment", "plot", "for", "worth", "value", "price", "cost"]
+# ...or precedes ("an 80 lakh flat").
+PRICED_NOUN_PATTERN = re.compile(AMOUNT_PATTERN.pattern + r"\s+(?:flat|house|property|apartment|plot)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
+def load_rate_table(path=RATES_FILE):
+    """Reads the CSV once into {(STATE, property_type): row}."""
+    table = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(line for line in f if not line.startswith("#"))
+        for row in rows:
+            key = (row["state"].strip().upper(), row["property_type"].strip().lower())
+            table[key] = {
+                "stamp": {
+                    "men": float(row["stamp_men"]),
+                    "women": float(row["stamp_women"]),
+                    "joint": float(row["stamp_joint"]),
+                },
+                "reg_pct": float(row["reg_pct"]),
+                "reg_cap": float(row["reg_cap"]),
+                "reg_women_pct": float(row["reg_women_pct"]),
+            }
+    return table
+
+
+def supported_states():
+    return sorted({state for state, _ in load_rate_table()})
+
+
+def find_state(text):
+    """Finds a supported state (or a known city) mentioned in `text`."""
+    upper = (text or "").upper()
+    for state in sorted(supported_states(), key=len, reverse=True):
+        if re.search(rf"\b{state}\b", upper):
+            return state
+    for city, state in CITY_TO_STATE.items():
+        if re.search(rf"\b{city}\b", upper):
+            return state
+    return None
+
+
+def calculate_property_cost(state, property_value, property_type="residential", buyer="men"):
+    """
+    Returns stamp duty, registration fee and the all-in cost for one purchase.
+    Raises KeyError for an unsupported state/property type.
+    """
+    rates = load_rate_table()[(state.strip().upper(), property_type.lower())]
+    value = float(property_value)
+
+    stamp_pct = rates["stamp"][buyer]
+    reg_pct = rates["reg_women_pct"] if buyer == "women" else rates["reg_pct"]
+    stamp_duty = value * stamp_pct / 100.0
+    registration = value * reg_pct / 100.0
+    if rates["reg_cap"] > 0:
+        registration = min(registration, rates["reg_cap"])
+
+    # What the same purchase costs a male buyer, to show the concession in rupees.
+    base_cost = value * rates["stamp"]["men"] / 100.0
+    base_reg = value * rates["reg_pct"] / 100.0
+    if rates["reg_cap"] > 0:
+        base_reg = min(base_reg, rates["reg_cap"])
+
+    return {
+        "state": state.strip().upper(),
+        "property_type": property_type.lower(),
+        "buyer": buyer,
+        "property_value": round(value, 2),
+        "stamp_duty_pct": stamp_pct,
+        "stamp_duty": round(stamp_duty, 2),
+        "registration_pct": reg_pct,
+        "registration_fee": round(registration, 2),
+        "concession_saving": round((base_cost + base_reg) - (stamp_duty + registration), 2),
+        "total_government_charges": round(stamp_duty + registration, 2),
+        "total_cost": round(value + stamp_duty + registration, 2),
+    }
+
+
+def is_property_query(query):
+    query_lower = query.lower()
+    return any(word in query_lower for word in PROPERTY_KEYWORDS)
+
+
+def detect_buyer(query):
+    query_lower = query.lower()
+    if any(word in query_lower for word in JOINT_KEYWORDS):
+        return "joint"
+    if any(word in query_lower for word in WOMEN_KEYWORDS):
+        return "women"
+    return "men"
+
+
+def detect_property_type(query):
+    query_lower = query.lower()
+    return "commercial" if any(word in query_lower for word in COMMERCIAL_KEYWORDS) else "residential"
+
+
+def property_value(query):
+    """
+    The price of the property in `query`, read next to a price anchor so a
+    salary or loan amount elsewhere is not mistaken for it. A lone amount is
+    taken as the price; None if the price is ambiguous.
+    """
+    values = set(amounts_near(query, PRICE_ANCHORS))
+    values.update(parse_amount(match.group(0)) for match in PRICED_NOUN_PATTERN.finditer(query))
+    values.discard(None)
+    if not values:
+        values = set(parse_amounts(query))
+    return values.pop() if len(values) == 1 else None
+
+
+def build_property_context(query):
+    """
+    For a property purchase question naming a state/city and a price, returns a
+    compact [COMPUTED PROPERTY COSTS] block for the prompt. Otherwise None.
+    """
+    if not is_property_query(query):
+        return None
+    state = find_state(query)
+    value = property_value(query)
+    if not state or not value:
+        return None
+
+    result = calculate_property_cost(state, value, detect_property_type(query), detect_buyer(query))
+    return format_property_cost(result)
+
+
+def format_property_cost(result):
+    lines = [
+        "[COMPUTED PROPERTY COSTS - USE THESE EXACT FIGURES]",
+        f"- State: {result['state'].title()} | Property: {result['property_type']} | Buyer: {result['buyer']}",
+        f"- Property Value: ₹{result['property_value']:,.0f}",
+        f"- Stamp Duty ({result['stamp_duty_pct']}%): ₹{result['stamp_duty']:,.0f}",
+        f"- Registration Fee ({result['registration_pct']}%): ₹{result['registration_fee']:,.0f}",
+        f"- Total Government Charges: ₹{result['total_government_charges']:,.0f}",
+        f"- All-in Cost: ₹{result['total_cost']:,.0f}",
+    ]
+    if result["concession_saving"] > 0:
+        lines.append(f"- Concession vs male buyer: ₹{result['concession_saving']:,.0f} saved")
+    lines.append("- Rates are indicative state rates; circle/ready-reckoner value applies if higher than the price.")
+    return "\n".join(lines)
@@ -0,0 +1,250 @@
+# ==============================================================================
+# state_store.py - Shared State Backend (Chat History, Answer Cache, Rate Limits)
+# ==============================================================================
+# Lets several app replicas run behind a load balancer without sticky sessions:
+# chat history, cached answers and rate-limit counters live in a backend that
+# all replicas share.
+#
+#   - InMemoryBackend: default, single process (same behaviour as before).
+#   - RedisBackend:    any Redis-compatible client (get/set/incr/delete, lists
+#                      and MULTI/EXEC pipelines).
+#                      Enabled by setting CLEARHAI_REDIS_URL.
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+from query_parser import parse_amounts
+
+REDIS_URL_ENV = "CLEARHAI_REDIS_URL"
+KEY_PREFIX = "clearhai:"
+
+SESSION_TTL = 7 * 24 * 3600        # chat history kept for a week of inactivity
+ANSWER_CACHE_TTL = 24 * 3600       # cached answers refresh daily (tax dates move)
+RATE_LIMIT_REQUESTS = 20           # questions per session...
+RATE_LIMIT_WINDOW = 60             # ...per minute
+ANSWER_INDEX_SIZE = 200            # recent questions kept per language for near-match lookup
+NEAR_MATCH_THRESHOLD = 0.8         # difflib ratio needed to reuse another question's answer
+PURGE_INTERVAL = 60                # seconds between sweeps of expired in-memory keys
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def answer_cache_key(query, language):
+    digest = hashlib.sha1(f"{language}|{normalize_query(query)}".encode("utf-8")).hexdigest()
+    return f"answer:{digest}"
+
+
+class StateBackend:
+    """
+    Key/value and list primitives plus the app-level helpers built on them.
+    Subclasses implement get/set/incr/delete/push_recent/get_list; values are
+    JSON-serialisable.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def incr(self, key, ttl=None):
+        """Atomically increments an integer counter; `ttl` applies when it is created."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def push_recent(self, key, value, max_len, ttl=None):
+        """
+        Atomically moves `value` to the front of the list at `key` (dropping any
+        earlier copy) and trims the list to `max_len` entries.
+        """
+        raise NotImplementedError
+
+    def get_list(self, key):
+        """The list at `key`, most recent first ([] if missing)."""
+        raise NotImplementedError
+
+    # --- Chat history ---
+    def load_chats(self, session_id):
+        return self.get(f"session:{session_id}")
+
+    def save_chats(self, session_id, chats):
+        self.set(f"session:{session_id}", chats, ttl=SESSION_TTL)
+
+    # --- Answer cache ---
+    def get_cached_answer(self, query, language):
+        answer = self.get(answer_cache_key(query, language))
+        self.incr("metrics:cache_hits" if answer is not None else "metrics:cache_misses")
+        return answer
+
+    def cache_answer(self, query, language, answer, ttl=ANSWER_CACHE_TTL):
+        self.set(answer_cache_key(query, language), answer, ttl=ttl)
+        self.push_recent(f"answer_index:{language}", normalize_query(query), ANSWER_INDEX_SIZE, ttl=ttl)
+
+    def find_similar_answer(self, query, language, threshold=NEAR_MATCH_THRESHOLD):
+        """
+        Cached answer to the most similar recent question, if it is close enough.
+        Questions with different amounts never match ("80 lakh flat" is not
+        "95 lakh flat"), since their answers carry different figures.
+        """
+        target = normalize_query(query)
+        amounts = parse_amounts(target)
+        best, best_score = None, 0.0
+        for question in self.get_list(f"answer_index:{language}"):
+            if parse_amounts(question) != amounts:
+                continue
+            score = difflib.SequenceMatcher(None, target, question).ratio()
+            if score > best_score:
+                best, best_score = question, score
+        if best is None or best_score < threshold:
+            return None
+        return self.get(answer_cache_key(best, language))
+
+    def cache_stats(self):
+        hits = int(self.get("metrics:cache_hits") or 0)
+        misses = int(self.get("metrics:cache_misses") or 0)
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+    # --- Rate limiting (fixed window per session) ---
+    def hit_rate_limit(self, session_id, limit=RATE_LIMIT_REQUESTS, window=RATE_LIMIT_WINDOW):
+        """Counts one request; returns True if the session is over its limit."""
+        bucket = int(time.time() // window)
+        count = self.incr(f"ratelimit:{session_id}:{bucket}", ttl=window)
+        return count > limit
+
+
+class InMemoryBackend(StateBackend):
+    """Process-local backend. Thread-safe, since Streamlit serves sessions on threads."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+
+    def _purge_expired(self):
+        """
+        Drops every expired key, at most once per PURGE_INTERVAL. Rate-limit
+        buckets and one-off answers are never read again, so reads alone would
+        never free them. Called with the lock held, on writes.
+        """
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return None if entry is None else json.loads(entry[0])
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._purge_expired()
+            self._data[key] = (json.dumps(value), time.time() + ttl if ttl else None)
+
+    def incr(self, key, ttl=None):
+        with self._lock:
+            self._purge_expired()
+            entry = self._live(key)
+            if entry is None:
+                count, expires_at = 1, (time.time() + ttl if ttl else None)
+            else:
+                count, expires_at = int(json.loads(entry[0])) + 1, entry[1]
+            self._data[key] = (json.dumps(count), expires_at)
+            return count
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def push_recent(self, key, value, max_len, ttl=None):
+        with self._lock:
+            self._purge_expired()
+            entry = self._live(key)
+            items = [] if entry is None else [item for item in json.loads(entry[0]) if item != value]
+            self._data[key] = (json.dumps([value] + items[:max_len - 1]), time.time() + ttl if ttl else None)
+
+    def get_list(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return [] if entry is None else json.loads(entry[0])
+
+
+class RedisBackend(StateBackend):
+    """
+    Backend over a Redis-compatible `client` (redis.Redis, or any stand-in with
+    the same get/set(ex=, nx=)/incr/delete/lrange methods and a MULTI/EXEC
+    pipeline()). Keys are namespaced.
+    """
+
+    def __init__(self, client, prefix=KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def incr(self, key, ttl=None):
+        if not ttl:
+            return int(self.client.incr(self.prefix + key))
+        # SET NX EX creates the counter with its TTL; both run in one transaction.
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, 0, ex=ttl, nx=True)
+        pipe.incr(self.prefix + key)
+        return int(pipe.execute()[-1])
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def push_recent(self, key, value, max_len, ttl=None):
+        raw = json.dumps(value)
+        pipe = self.client.pipeline()
+        pipe.lrem(self.prefix + key, 0, raw)
+        pipe.lpush(self.prefix + key, raw)
+        pipe.ltrim(self.prefix + key, 0, max_len - 1)
+        if ttl:
+            pipe.expire(self.prefix + key, ttl)
+        pipe.execute()
+
+    def get_list(self, key):
+        return [json.loads(raw) for raw in self.client.lrange(self.prefix + key, 0, -1)]
+
+
+@lru_cache(maxsize=1)
+def get_backend():
+    """Shared backend for this process: Redis if CLEARHAI_REDIS_URL is set, else in-memory."""
+    url = os.environ.get(REDIS_URL_ENV)
+    if not url:
+        return InMemoryBackend()
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError(f"{REDIS_URL_ENV} is set but the 'redis' package is not installed.") from e
+    return RedisBackend(redis.Redis.from_url(url))
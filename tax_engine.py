@@ -0,0 +1,605 @@
+# ==============================================================================
+# tax_engine.py - Local Income Tax Engine (Old vs New Regime, ITR Selection)
+# ==============================================================================
+# Slab tax, 87A rebate, surcharge, cess, 234F, ITR-U additional tax, 115BBH and
+# ITR-1/2/3/4 selection, computed locally. The app feeds these exact figures to
+# the LLM instead of asking an 8B model to do the arithmetic.
+#
+# The slab maths is written over NumPy arrays, so `compare_regimes_batch` can
+# evaluate thousands of profiles in one call; the single-profile helpers are
+# thin wrappers over the same code.
+
+import datetime
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from query_parser import locate_amount_near, parse_amount, parse_amounts
+
+CESS_RATE = 0.04
+VDA_RATE = 0.30            # Section 115BBH
+STCG_111A_RATE = 0.20
+LTCG_112A_RATE = 0.125
+LTCG_112A_EXEMPTION = 125000
+ITR1_ITR4_INCOME_LIMIT = 5000000
+ITR1_AGRI_INCOME_LIMIT = 5000
+LATE_FEE_LOW_INCOME_LIMIT = 500000   # Section 234F(1) proviso
+
+# (upper limit of slab, rate). The last slab has no upper limit.
+SLABS = {
+    ("new", "2024-25"): [(300000, 0.0), (700000, 0.05), (1000000, 0.10), (1200000, 0.15), (1500000, 0.20), (np.inf, 0.30)],
+    ("new", "2025-26"): [(400000, 0.0), (800000, 0.05), (1200000, 0.10), (1600000, 0.15), (2000000, 0.20), (2400000, 0.25), (np.inf, 0.30)],
+    ("old", "2024-25"): [(250000, 0.0), (500000, 0.05), (1000000, 0.20), (np.inf, 0.30)],
+    ("old", "2025-26"): [(250000, 0.0), (500000, 0.05), (1000000, 0.20), (np.inf, 0.30)],
+}
+
+# Old regime basic exemption for senior (60-79) and super senior (80+) citizens.
+OLD_REGIME_SENIOR_EXEMPTION = {60: 300000, 80: 500000}
+
+STANDARD_DEDUCTION = {"new": 75000, "old": 50000}
+
+# Section 87A: (income ceiling, max rebate, marginal relief available)
+REBATE_87A = {
+    ("new", "2024-25"): (700000, 25000, True),
+    ("new", "2025-26"): (1200000, 60000, True),
+    ("old", "2024-25"): (500000, 12500, False),
+    ("old", "2025-26"): (500000, 12500, False),
+}
+
+# (income threshold, surcharge rate). The new regime caps surcharge at 25%.
+SURCHARGE_SLABS = [(5000000, 0.10), (10000000, 0.15), (20000000, 0.25), (50000000, 0.37)]
+NEW_REGIME_SURCHARGE_CAP = 0.25
+
+# Section 139(8A) additional tax by months elapsed since the end of the relevant AY.
+ITR_U_ADDITIONAL_TAX = [(12, 0.25), (24, 0.50), (36, 0.60), (48, 0.70)]
+
+DEFAULT_FY = "2025-26"
+
+
+@dataclass
+class TaxProfile:
+    """One taxpayer's income picture for a financial year (all amounts in ₹)."""
+    salary: float = 0.0
+    house_property_income: float = 0.0
+    other_income: float = 0.0
+    business_income: float = 0.0          # regular books (non-presumptive)
+    presumptive_income: float = 0.0       # 44AD / 44ADA / 44AE
+    stcg_111a: float = 0.0
+    ltcg_112a: float = 0.0
+    other_capital_gains: float = 0.0      # property, debt funds, unlisted shares etc.
+    vda_gains: list = field(default_factory=list)   # one entry per crypto asset/transfer
+    agricultural_income: float = 0.0
+    deductions: float = 0.0               # Chapter VI-A (80C, 80D...), old regime only
+    age: int = 30
+    resident: bool = True
+    house_properties: int = 0
+    foreign_assets: bool = False          # includes vested RSUs/ESOPs abroad (Schedule FA)
+    is_director: bool = False
+    unlisted_shares: bool = False
+
+
+@dataclass
+class TaxResult:
+    regime: str
+    fy: str
+    gross_total_income: float
+    taxable_income: float
+    slab_tax: float
+    special_rate_tax: float
+    rebate_87a: float
+    surcharge: float
+    cess: float
+    total_tax: float
+
+
+@dataclass
+class RegimeComparison:
+    old: TaxResult
+    new: TaxResult
+    recommended: str
+    saving: float
+
+
+@dataclass
+class ItrSelection:
+    form: str
+    reasons: list
+
+
+@dataclass
+class AdditionalTax:
+    months_elapsed: int
+    rate: float
+    amount: float
+
+
+# ------------------------------------------------------------------------------
+# Vectorized core
+# ------------------------------------------------------------------------------
+
+def slab_tax(taxable_income, slabs, basic_exemption=None):
+    """Tax on `taxable_income` (array) under `slabs`; optional per-row basic exemption."""
+    income = np.asarray(taxable_income, dtype=float)
+    limits = np.array([limit for limit, _ in slabs], dtype=float)
+    rates = np.array([rate for _, rate in slabs], dtype=float)
+    lowers = np.concatenate(([0.0], limits[:-1]))
+
+    if basic_exemption is not None:
+        # Raises the nil slab (and the next slab's floor) for senior citizens.
+        exemption = np.asarray(basic_exemption, dtype=float)[..., None]
+        lowers = np.broadcast_to(lowers, exemption.shape[:-1] + lowers.shape).copy()
+        limits = np.broadcast_to(limits, lowers.shape).copy()
+        limits[..., 0] = exemption[..., 0]
+        lowers[..., 1] = exemption[..., 0]
+
+    taxed = np.clip(income[..., None] - lowers, 0.0, limits - lowers)
+    return (taxed * rates).sum(axis=-1)
+
+
+def _surcharge_rate(total_income, regime):
+    income = np.asarray(total_income, dtype=float)
+    rate = np.zeros_like(income)
+    for threshold, slab_rate in SURCHARGE_SLABS:
+        if regime == "new":
+            slab_rate = min(slab_rate, NEW_REGIME_SURCHARGE_CAP)
+        rate = np.where(income > threshold, slab_rate, rate)
+    return rate
+
+
+def _slab_tax_after_rebate(normal_income, total_income, regime, fy, basic_exemption, resident):
+    """Slab tax on normal income and the Section 87A rebate (residents only) against it (arrays)."""
+    slab = slab_tax(np.maximum(normal_income, 0.0), SLABS[(regime, fy)], basic_exemption)
+
+    ceiling, max_rebate, marginal_relief = REBATE_87A[(regime, fy)]
+    rebate = np.where(total_income <= ceiling, np.minimum(slab, max_rebate), 0.0)
+    if marginal_relief:
+        # Just above the ceiling, slab tax may not exceed the income above the ceiling.
+        excess = total_income - ceiling
+        rebate = np.where((total_income > ceiling) & (slab > excess), slab - excess, rebate)
+    return slab, np.where(resident, rebate, 0.0)
+
+
+def compute_tax_arrays(salary, other_normal_income, deductions, stcg_111a, ltcg_112a, vda_income,
+                       age, regime, fy=DEFAULT_FY, resident=True):
+    """
+    Vectorized tax for many profiles under one regime. All income arguments are
+    arrays of equal length; returns a dict of arrays.
+    """
+    salary = np.asarray(salary, dtype=float)
+    other_normal_income = np.asarray(other_normal_income, dtype=float)
+    stcg = np.maximum(np.asarray(stcg_111a, dtype=float), 0.0)
+    ltcg = np.maximum(np.asarray(ltcg_112a, dtype=float), 0.0)
+    vda = np.maximum(np.asarray(vda_income, dtype=float), 0.0)
+    age = np.asarray(age, dtype=float)
+    resident = np.broadcast_to(np.asarray(resident, dtype=bool), salary.shape)
+
+    standard = np.where(salary > 0, np.minimum(salary, STANDARD_DEDUCTION[regime]), 0.0)
+    chapter_via = np.asarray(deductions, dtype=float) if regime == "old" else 0.0
+    normal_income = np.maximum(salary - standard + other_normal_income - chapter_via, 0.0)
+    special_income = stcg + ltcg + vda
+    total_income = normal_income + special_income
+
+    basic_exemption = None
+    if regime == "old":
+        # The higher senior exemptions apply to residents only.
+        senior_age = np.where(resident, age, 0.0)
+        basic_exemption = np.where(senior_age >= 80, OLD_REGIME_SENIOR_EXEMPTION[80],
+                                   np.where(senior_age >= 60, OLD_REGIME_SENIOR_EXEMPTION[60], SLABS[("old", fy)][0][0]))
+
+    special_tax = (
+        stcg * STCG_111A_RATE
+        + np.maximum(ltcg - LTCG_112A_EXEMPTION, 0.0) * LTCG_112A_RATE
+        + vda * VDA_RATE
+    )
+    slab, rebate = _slab_tax_after_rebate(normal_income, total_income, regime, fy, basic_exemption, resident)
+    tax = np.maximum(slab - rebate, 0.0) + special_tax
+    surcharge = tax * _surcharge_rate(total_income, regime)
+
+    # Marginal relief: tax + surcharge may not grow by more than the income above a threshold.
+    for threshold, _ in SURCHARGE_SLABS:
+        above = total_income > threshold
+        if not above.any():
+            continue
+        normal_at_threshold = np.maximum(threshold - special_income, 0.0)
+        income_at_threshold = np.full_like(total_income, float(threshold))
+        slab_t, rebate_t = _slab_tax_after_rebate(normal_at_threshold, income_at_threshold, regime, fy,
+                                                  basic_exemption, resident)
+        tax_t = np.maximum(slab_t - rebate_t, 0.0) + special_tax
+        tax_t = tax_t * (1.0 + _surcharge_rate(income_at_threshold, regime))
+        max_surcharge = np.maximum(tax_t + (total_income - threshold) - tax, 0.0)
+        surcharge = np.where(above, np.minimum(surcharge, max_surcharge), surcharge)
+
+    cess = (tax + surcharge) * CESS_RATE
+    return {
+        "gross_total_income": salary + other_normal_income + special_income,
+        "taxable_income": total_income,
+        "slab_tax": slab,
+        "special_rate_tax": special_tax,
+        "rebate_87a": np.minimum(rebate, slab),
+        "surcharge": surcharge,
+        "cess": cess,
+        "total_tax": np.round(tax + surcharge + cess),
+    }
+
+
+# ------------------------------------------------------------------------------
+# Single-profile API
+# ------------------------------------------------------------------------------
+
+def vda_taxable_income(vda_gains):
+    """
+    Section 115BBH: each positive VDA gain is taxed; a loss on one asset is NOT
+    set off against a gain on another, and only cost of acquisition is deductible.
+    """
+    gains = np.asarray(list(vda_gains) or [0.0], dtype=float)
+    return float(np.maximum(gains, 0.0).sum())
+
+
+def vda_tax_115bbh(vda_gains):
+    """Flat 30% VDA tax plus 4% cess (surcharge, if any, comes from compute_tax)."""
+    tax = vda_taxable_income(vda_gains) * VDA_RATE
+    return round(tax * (1.0 + CESS_RATE), 2)
+
+
+def _profile_arrays(profiles):
+    return {
+        "salary": [p.salary for p in profiles],
+        "other_normal_income": [
+            p.house_property_income + p.other_income + p.business_income
+            + p.presumptive_income + p.other_capital_gains
+            for p in profiles
+        ],
+        "deductions": [p.deductions for p in profiles],
+        "stcg_111a": [p.stcg_111a for p in profiles],
+        "ltcg_112a": [p.ltcg_112a for p in profiles],
+        "vda_income": [vda_taxable_income(p.vda_gains) for p in profiles],
+        "age": [p.age for p in profiles],
+        "resident": [p.resident for p in profiles],
+    }
+
+
+def _result_at(arrays, index, regime, fy):
+    return TaxResult(
+        regime=regime,
+        fy=fy,
+        **{key: round(float(values[index]), 2) for key, values in arrays.items()},
+    )
+
+
+def compute_tax(profile, regime="new", fy=DEFAULT_FY):
+    """Total tax for one profile under one regime."""
+    arrays = compute_tax_arrays(**_profile_arrays([profile]), regime=regime, fy=fy)
+    return _result_at(arrays, 0, regime, fy)
+
+
+def compare_regimes_batch(profiles, fy=DEFAULT_FY):
+    """Old vs new regime for many profiles, computed in two vectorized passes."""
+    inputs = _profile_arrays(profiles)
+    old = compute_tax_arrays(**inputs, regime="old", fy=fy)
+    new = compute_tax_arrays(**inputs, regime="new", fy=fy)
+
+    comparisons = []
+    for i in range(len(profiles)):
+        old_result, new_result = _result_at(old, i, "old", fy), _result_at(new, i, "new", fy)
+        recommended = "new" if new_result.total_tax <= old_result.total_tax else "old"
+        comparisons.append(RegimeComparison(
+            old=old_result,
+            new=new_result,
+            recommended=recommended,
+            saving=abs(old_result.total_tax - new_result.total_tax),
+        ))
+    return comparisons
+
+
+def compare_regimes(profile, fy=DEFAULT_FY):
+    return compare_regimes_batch([profile], fy)[0]
+
+
+def late_fee_234f(total_income, filed_on, due_date):
+    """Section 234F: ₹5,000 after the due date, ₹1,000 if total income ≤ ₹5 lakh."""
+    if filed_on <= due_date:
+        return 0
+    return 1000 if total_income <= LATE_FEE_LOW_INCOME_LIMIT else 5000
+
+
+def months_since_ay_end(ay_end, filed_on):
+    """Whole or part months elapsed after the end of the assessment year."""
+    months = (filed_on.year - ay_end.year) * 12 + (filed_on.month - ay_end.month)
+    if filed_on.day > ay_end.day:
+        months += 1
+    return max(months, 0)
+
+
+def itr_u_additional_tax(tax_and_interest, months_elapsed):
+    """
+    Section 139(8A) additional tax on the aggregate of tax and interest payable.
+    Raises ValueError once the ITR-U window has closed.
+    """
+    for limit, rate in ITR_U_ADDITIONAL_TAX:
+        if months_elapsed <= limit:
+            return AdditionalTax(months_elapsed, rate, round(float(tax_and_interest) * rate, 2))
+    raise ValueError(f"ITR-U window closed ({months_elapsed} months after end of AY)")
+
+
+def select_itr_form(profile):
+    """Picks ITR-1/2/3/4 for an individual, with the reasons that decided it."""
+    reasons = []
+    total_income = (
+        profile.salary + profile.house_property_income + profile.other_income
+        + profile.business_income + profile.presumptive_income + profile.stcg_111a
+        + profile.ltcg_112a + profile.other_capital_gains + vda_taxable_income(profile.vda_gains)
+    )
+
+    # Anything that rules out the simple forms (ITR-1 and ITR-4).
+    if not profile.resident:
+        reasons.append("Non-resident / RNOR cannot use ITR-1 or ITR-4.")
+    if profile.foreign_assets:
+        reasons.append("Foreign assets (incl. vested RSUs/ESOPs) require Schedule FA, not available in ITR-1/ITR-4.")
+    if total_income > ITR1_ITR4_INCOME_LIMIT:
+        reasons.append("Total income above ₹50 lakh.")
+    if profile.is_director:
+        reasons.append("Director in a company.")
+    if profile.unlisted_shares:
+        reasons.append("Held unlisted equity shares during the year.")
+    if profile.agricultural_income > ITR1_AGRI_INCOME_LIMIT:
+        reasons.append("Agricultural income above ₹5,000.")
+    if profile.stcg_111a or profile.other_capital_gains or profile.ltcg_112a > LTCG_112A_EXEMPTION:
+        reasons.append("Capital gains beyond LTCG u/s 112A up to ₹1.25 lakh.")
+    if profile.vda_gains:
+        reasons.append("Crypto/VDA transactions must be reported in Schedule VDA.")
+    if profile.house_properties > 1:
+        reasons.append("More than one house property.")
+    simple_form_blocked = bool(reasons)
+
+    if profile.business_income:
+        reasons.append("Business/profession income under regular books.")
+        return ItrSelection("ITR-3", reasons)
+
+    if profile.presumptive_income:
+        if simple_form_blocked:
+            reasons.append("Presumptive income (44AD/44ADA) with the above moves to ITR-3.")
+            return ItrSelection("ITR-3", reasons)
+        return ItrSelection("ITR-4", ["Presumptive business/profession income (44AD/44ADA/44AE)."])
+
+    if reasons:
+        return ItrSelection("ITR-2", reasons)
+    return ItrSelection("ITR-1", ["Resident with salary/one house property/other sources up to ₹50 lakh."])
+
+
+def itr_due_dates(fy):
+    """Normal (139(1)) and belated (139(4)) due dates plus AY end for a non-audit individual."""
+    ay_start = int(fy.split("-")[0]) + 1
+    return {
+        "normal": datetime.date(ay_start, 7, 31),
+        "belated": datetime.date(ay_start, 12, 31),
+        "ay_end": datetime.date(ay_start + 1, 3, 31),
+    }
+
+
+# ------------------------------------------------------------------------------
+# Filing calendar
+# ------------------------------------------------------------------------------
+
+def get_tax_filing_context(today=None):
+    """Filing status on `today` for the most recently completed FY (non-audit individual)."""
+    today = today or datetime.date.today()
+    fy = fy_for_date(today)
+    due = itr_due_dates(fy)
+    if today <= due["normal"]:
+        status = f"**Normal Filing Window** for FY {fy} (ends {due['normal']:%B %d, %Y}). No penalty."
+    elif today <= due["belated"]:
+        status = (
+            f"**Belated Filing Window** for FY {fy} (ends {due['belated']:%B %d, %Y}). "
+            "Late fee u/s 234F: ₹1,000 (if income ≤ ₹5L) or ₹5,000."
+        )
+    else:
+        status = f"**Window Closed** for FY {fy}. Only ITR-U (Updated Return) is possible."
+    return f"Today is {today:%B %d, %Y}. Current Status: {status}"
+
+
+# ------------------------------------------------------------------------------
+# Prompt context
+# ------------------------------------------------------------------------------
+
+INCOME_KEYWORDS = ["salary", "income", "ctc", "package", "earn", "lpa"]
+VDA_KEYWORDS = ["crypto", "bitcoin", "vda", "ethereum"]
+FOREIGN_KEYWORDS = ["rsu", "esop", "foreign", "us stock", "schedule fa"]
+PRESUMPTIVE_KEYWORDS = ["44ad", "44ada", "44ae", "presumptive"]
+BUSINESS_KEYWORDS = ["business", "shop", "commission", "freelanc"]
+
+MONTHLY_PATTERN = re.compile(r"\bper\s+month\b|\ba\s+month\b|\bmonthly\b|\bper\s+mensem\b|\bpm\b|\bp\.m\.|/\s*(?:month|mo)\b")
+ANNUAL_PATTERN = re.compile(r"\blpa\b|\bper\s+annum\b|\bp\.a\.|\bpa\b|\bannual(?:ly)?\b|\byearly\b|\bper\s+year\b|\ba\s+year\b")
+# An income this small with no period stated may be monthly pay; no figures are computed.
+MIN_UNSTATED_ANNUAL_INCOME = 250000
+
+STCG_PATTERN = re.compile(r"short[\s-]*term\s+capital\s+gains?|\bstcg\b")
+LTCG_PATTERN = re.compile(r"long[\s-]*term\s+capital\s+gains?|\bltcg\b")
+CAPITAL_GAIN_PATTERN = re.compile(r"capital\s+gains?|\bstcg\b|\bltcg\b")
+# 111A / 112A rates apply only to listed equity (shares, equity funds).
+EQUITY_PATTERN = re.compile(r"\bshares?\b|\bequity\b|\bstocks?\b|mutual\s+funds?|\betfs?\b")
+LOSS_PATTERN = re.compile(r"\blos(?:s|ses|t)\b")
+NON_RESIDENT_PATTERN = re.compile(r"\bnri\b|non[\s-]*resident|\brnor\b")
+AGE_PATTERN = re.compile(r"\bage[ds]?\s*(?:is\s*)?(\d{2})\b|\b(\d{2})\s*(?:years?|yrs?)\s*old\b")
+SENIOR_AGES = [(re.compile(r"super[\s-]*senior"), 80), (re.compile(r"senior\s+citizen"), 60)]
+
+# (pattern, cap, cap for age 60+) for the old-regime deductions the engine models.
+DEDUCTION_RULES = [
+    (re.compile(r"\b80ccd\s*\(?1b\)?|\bnps\b"), 50000, 50000),
+    (re.compile(r"\b80c\b|\bppf\b|\belss\b"), 150000, 150000),
+    (re.compile(r"\b80d\b|health\s+insurance|mediclaim"), 25000, 50000),
+    (re.compile(r"home\s+loan\s+interest|interest\s+on\s+(?:my\s+|a\s+)?home\s+loan|\b24\s*\(?b\)?"), 200000, 200000),
+]
+# Deductions and exemptions the engine does not model; stating one means no figures.
+UNSUPPORTED_PATTERN = re.compile(r"\bhra\b|\b80e\b|\b80eea?\b|\b80g\b|\b80tt[ab]\b|\b80u\b|\b80dd[b]?\b|\bparents\b")
+
+
+def fy_for_date(today):
+    """The most recently completed financial year on `today`, e.g. '2025-26'."""
+    start = today.year - 1 if today.month > 3 else today.year - 2
+    return f"{start}-{str(start + 1)[-2:]}"
+
+
+def _previous_fy(fy):
+    start = int(fy.split("-")[0]) - 1
+    return f"{start}-{str(start + 1)[-2:]}"
+
+
+def annual_income(amount, context):
+    """
+    Annualises an income read from `context` ("50k per month" -> 6,00,000).
+    None when the period is unclear (both stated, or a small amount with neither).
+    """
+    context = context.lower()
+    monthly, annual = MONTHLY_PATTERN.search(context), ANNUAL_PATTERN.search(context)
+    if monthly and annual:
+        return None
+    if monthly:
+        return amount * 12
+    if not annual and amount < MIN_UNSTATED_ANNUAL_INCOME:
+        return None
+    return amount
+
+
+def _amount_after(query, pattern, window=40):
+    """(matched, amount): whether `pattern` occurs, and the first amount after it."""
+    match = pattern.search(query.lower())
+    if not match:
+        return False, None
+    return True, parse_amount(query[match.start():match.end() + window])
+
+
+def _age_from_query(query_lower):
+    match = AGE_PATTERN.search(query_lower)
+    if match:
+        return int(match.group(1) or match.group(2))
+    for pattern, age in SENIOR_AGES:
+        if pattern.search(query_lower):
+            return age
+    return None
+
+
+def profile_from_query(query):
+    """
+    Builds a TaxProfile from a free-text question. Returns None when no income
+    is stated, or when the question states something the profile cannot
+    represent (unclear pay period, a loss other than on crypto, capital gains
+    other than on listed equity, an unmodelled deduction, an amount that two
+    items could both claim), so no wrong figures are pinned in the prompt.
+    """
+    query_lower = query.lower()
+    if UNSUPPORTED_PATTERN.search(query_lower):
+        return None
+    amounts = parse_amounts(query)
+
+    income, context = locate_amount_near(query, INCOME_KEYWORDS)
+    vda, vda_context = locate_amount_near(query, VDA_KEYWORDS)
+    vda_loss = vda is not None and LOSS_PATTERN.search(vda_context.lower())
+    if LOSS_PATTERN.search(query_lower) and not vda_loss:
+        return None
+
+    stcg = ltcg = None
+    if CAPITAL_GAIN_PATTERN.search(query_lower):
+        _, stcg = _amount_after(query, STCG_PATTERN)
+        _, ltcg = _amount_after(query, LTCG_PATTERN)
+        if (stcg is None and ltcg is None) or not EQUITY_PATTERN.search(query_lower) \
+                or any(word in query_lower for word in FOREIGN_KEYWORDS):
+            return None
+
+    specific = [amount for amount in (vda, stcg, ltcg) if amount is not None]
+    if income in specific and amounts.count(income) == 1:
+        # "crypto income of 3 lakh": the only amount belongs to the specific item.
+        income = None
+    if income is not None:
+        income = annual_income(income, context)
+        if income is None:
+            return None
+    elif not specific:
+        return None
+
+    age = _age_from_query(query_lower)
+    deductions = 0.0
+    for pattern, cap, senior_cap in DEDUCTION_RULES:
+        matched, amount = _amount_after(query, pattern)
+        if not matched:
+            continue
+        if amount is None or (amount in specific + [income] and amounts.count(amount) == 1):
+            return None
+        deductions += min(amount, senior_cap if (age or 0) >= 60 else cap)
+
+    profile = TaxProfile(
+        foreign_assets=any(word in query_lower for word in FOREIGN_KEYWORDS),
+        resident=not NON_RESIDENT_PATTERN.search(query_lower),
+        deductions=deductions,
+    )
+    if age is not None:
+        profile.age = age
+    if vda is not None:
+        # 115BBH: a loss is recorded but never set off against other income.
+        profile.vda_gains = [-vda if vda_loss else vda]
+    profile.stcg_111a = stcg or 0.0
+    profile.ltcg_112a = ltcg or 0.0
+    if income is None:
+        return profile
+    if any(word in query_lower for word in PRESUMPTIVE_KEYWORDS):
+        profile.presumptive_income = income
+    elif any(word in query_lower for word in BUSINESS_KEYWORDS):
+        profile.business_income = income
+    elif "salary" in query_lower or "ctc" in query_lower or "package" in query_lower or "lpa" in query_lower:
+        profile.salary = income
+    else:
+        profile.other_income = income
+    return profile
+
+
+def build_tax_context(query, today=None):
+    """
+    For a tax question that states an income, returns a [COMPUTED TAX FIGURES]
+    block (regime comparison, ITR form, 234F, ITR-U cost). Otherwise None.
+    """
+    profile = profile_from_query(query)
+    if profile is None:
+        return None
+
+    today = today or datetime.date.today()
+    fy = fy_for_date(today)
+    if ("new", fy) not in SLABS:
+        fy = DEFAULT_FY
+    comparison = compare_regimes(profile, fy)
+    best = comparison.new if comparison.recommended == "new" else comparison.old
+    itr = select_itr_form(profile)
+    due = itr_due_dates(fy)
+
+    lines = [
+        f"[COMPUTED TAX FIGURES - FY {fy} - USE THESE EXACT FIGURES]",
+        f"- Gross Income: ₹{best.gross_total_income:,.0f}",
+        f"- Old Regime Tax: ₹{comparison.old.total_tax:,.0f} | New Regime Tax: ₹{comparison.new.total_tax:,.0f}",
+        f"- Better Regime: {comparison.recommended.upper()} (saves ₹{comparison.saving:,.0f})",
+        f"- 87A Rebate: ₹{best.rebate_87a:,.0f} | Surcharge: ₹{best.surcharge:,.0f} | Cess: ₹{best.cess:,.0f}",
+        f"- ITR Form: {itr.form} ({' '.join(itr.reasons)})",
+    ]
+    if profile.vda_gains:
+        lines.append(f"- Crypto/VDA Tax u/s 115BBH (30% + cess): ₹{vda_tax_115bbh(profile.vda_gains):,.0f}")
+        vda_loss = -sum(gain for gain in profile.vda_gains if gain < 0)
+        if vda_loss:
+            lines.append(f"- Crypto/VDA Loss ₹{vda_loss:,.0f}: cannot be set off or carried forward (115BBH)")
+
+    late_fee = late_fee_234f(best.taxable_income, today, due["normal"])
+    if today <= due["belated"]:
+        lines.append(f"- Late Fee u/s 234F if filed today: ₹{late_fee:,}")
+
+    previous_fy = _previous_fy(fy)
+    previous_tax = best.total_tax
+    if ("new", previous_fy) in SLABS:
+        previous = compare_regimes(profile, previous_fy)
+        previous_tax = min(previous.old.total_tax, previous.new.total_tax)
+    months = months_since_ay_end(itr_due_dates(previous_fy)["ay_end"], today)
+    try:
+        additional = itr_u_additional_tax(previous_tax, months)
+        lines.append(
+            f"- ITR-U for FY {previous_fy} (same income): Tax ₹{previous_tax:,.0f} + "
+            f"{additional.rate:.0%} Additional Tax ₹{additional.amount:,.0f} + interest"
+        )
+    except ValueError:
+        lines.append(f"- ITR-U for FY {previous_fy}: window closed.")
+    return "\n".join(lines)
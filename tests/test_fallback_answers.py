@@ -0,0 +1,46 @@
+import pytest
+
+import fallback_answers
+
+# Ordinary questions that mention a scam topic without any scam signal.
+NOT_SCAM_CASES = [
+    "Does SBI charge a processing fee on home loans?",
+    "How much customs duty on an iPhone bought in Dubai?",
+    "How do I update KYC for my mutual fund?",
+    "HR wants a video call for my exit interview",
+    "What should our carbon footprint disclosure include?",
+    "My parcel is delayed, can I get a refund from the seller?",
+    "Is lottery prize money taxable?",
+]
+
+
+@pytest.mark.parametrize("query", NOT_SCAM_CASES)
+def test_no_scam_verdict_without_scam_signal(query):
+    assert fallback_answers.scam_answer(query) is None
+    assert "Verdict: SCAM" not in fallback_answers.rule_based_answer(query)
+
+
+# (question, text expected in the verdict)
+SCAM_CASES = [
+    ("I got a digital arrest video call from a CBI officer", "digital arrest"),
+    ("A customs officer on video call says I must pay to avoid arrest", "digital arrest"),
+    ("SMS says delivery failed, update address at bit.ly/xyz", "release"),
+    ("Pay ₹5 customs duty to release your parcel, says a message", "release"),
+    ("Recovery agent says police will arrest me under BNS 138 for my loan", "CIVIL"),
+    ("Can police arrest me for loan default?", "CIVIL"),
+    ("Congratulations, you have won 25 lakh in KBC!", "prize"),
+    ("Lottery message asks for a processing fee before paying the prize", "prize"),
+    ("Bank SMS says my account will be blocked unless I update KYC via link", "OTP"),
+    ("Caller asked me to share my OTP for a refund", "OTP"),
+]
+
+
+@pytest.mark.parametrize("query, expected", SCAM_CASES)
+def test_scam_verdicts(query, expected):
+    assert expected in fallback_answers.scam_answer(query)
+
+
+def test_bank_question_reaches_bank_rules():
+    answer = fallback_answers.rule_based_answer("Does SBI charge a processing fee on home loans?")
+    assert "State Bank Of India - Home Loan Rules" in answer
+    assert "NEVER" not in answer
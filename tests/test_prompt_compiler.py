@@ -0,0 +1,23 @@
+import prompt_compiler
+import stamp_duty
+import tax_engine
+
+
+def test_sample_contexts_produce_figures():
+    # The budget check only covers the appended blocks if the samples still parse.
+    assert tax_engine.build_tax_context(prompt_compiler.SAMPLE_TAX_QUERY, prompt_compiler.SAMPLE_DATE)
+    assert stamp_duty.build_property_context(prompt_compiler.SAMPLE_PROPERTY_QUERY)
+
+
+def test_every_prompt_variant_within_budget():
+    assert prompt_compiler.main([]) == 0
+
+
+def test_budget_check_fails_when_over():
+    assert prompt_compiler.main(["--budget", "100"]) == 1
+
+
+def test_single_role_per_prompt():
+    for build_prompt in prompt_compiler.PROMPT_VARIANTS.values():
+        prompt = build_prompt(prompt_compiler.language_instruction("English"))
+        assert prompt.count("[ROLE]") <= 1
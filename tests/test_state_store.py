@@ -0,0 +1,40 @@
+import pytest
+
+import state_store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(state_store.time, "time", lambda: now[0])
+    return now
+
+
+def test_expired_keys_are_purged_on_write(clock):
+    backend = state_store.InMemoryBackend()
+    for session in range(50):
+        backend.hit_rate_limit(f"s{session}")
+    backend.cache_answer("one-off question", "English", "answer", ttl=30)
+    backend.set("kept", 1)
+    assert len(backend._data) == 53
+
+    clock[0] += state_store.PURGE_INTERVAL + state_store.RATE_LIMIT_WINDOW
+    backend.incr("metrics:cache_hits")
+    assert set(backend._data) == {"kept", "metrics:cache_hits"}
+
+
+def test_purge_runs_at_most_once_per_interval(clock):
+    backend = state_store.InMemoryBackend()
+    backend.set("short", 1, ttl=1)
+    clock[0] += 2
+    backend.set("other", 2)
+    assert "short" in backend._data       # not swept yet, but no longer readable
+    assert backend.get("short") is None
+
+
+def test_rate_limit_window(clock):
+    backend = state_store.InMemoryBackend()
+    results = [backend.hit_rate_limit("s", limit=3) for _ in range(4)]
+    assert results == [False, False, False, True]
+    clock[0] += state_store.RATE_LIMIT_WINDOW
+    assert backend.hit_rate_limit("s", limit=3) is False
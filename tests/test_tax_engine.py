@@ -0,0 +1,292 @@
+import datetime
+
+import pytest
+
+import tax_engine
+from tax_engine import TaxProfile
+
+
+# ------------------------------------------------------------------------------
+# Slab tax, 87A rebate and surcharge
+# ------------------------------------------------------------------------------
+
+# (profile kwargs, regime, fy, total tax incl. 4% cess)
+SLAB_CASES = [
+    ({"other_income": 1600000}, "new", "2025-26", 124800),
+    ({"other_income": 1000000}, "new", "2024-25", 52000),
+    ({"other_income": 1000000}, "old", "2025-26", 117000),
+    ({"other_income": 1000000}, "old", "2024-25", 117000),
+    ({"other_income": 1000000, "age": 65}, "old", "2025-26", 114400),
+    ({"other_income": 1000000, "age": 82}, "old", "2025-26", 104000),
+    ({"other_income": 600000}, "old", "2025-26", 33800),
+    ({"salary": 1050000}, "new", "2024-25", 49400),
+]
+
+
+@pytest.mark.parametrize("kwargs, regime, fy, expected", SLAB_CASES)
+def test_slab_tax(kwargs, regime, fy, expected):
+    assert tax_engine.compute_tax(TaxProfile(**kwargs), regime, fy).total_tax == expected
+
+
+# (salary, regime, fy, total tax) around the Section 87A ceilings
+REBATE_CASES = [
+    (1275000, "new", "2025-26", 0),       # taxable 12L: full rebate
+    (1300000, "new", "2025-26", 26000),   # marginal relief: tax capped at income above 12L
+    (775000, "new", "2024-25", 0),        # taxable 7L
+    (550000, "old", "2025-26", 0),        # taxable 5L
+    (560000, "old", "2025-26", 15080),    # no marginal relief in the old regime
+]
+
+
+# (profile kwargs, regime, total tax): 87A and the senior exemptions are for residents only
+NON_RESIDENT_CASES = [
+    ({"other_income": 1000000}, "new", 41600),
+    ({"other_income": 500000}, "old", 13000),
+    ({"other_income": 1000000, "age": 70}, "old", 117000),
+]
+
+
+@pytest.mark.parametrize("kwargs, regime, expected", NON_RESIDENT_CASES)
+def test_non_resident_gets_no_rebate(kwargs, regime, expected):
+    result = tax_engine.compute_tax(TaxProfile(resident=False, **kwargs), regime, "2025-26")
+    assert result.rebate_87a == 0
+    assert result.total_tax == expected
+
+
+@pytest.mark.parametrize("salary, regime, fy, expected", REBATE_CASES)
+def test_rebate_87a(salary, regime, fy, expected):
+    assert tax_engine.compute_tax(TaxProfile(salary=salary), regime, fy).total_tax == expected
+
+
+# (salary, regime, surcharge)
+SURCHARGE_CASES = [
+    (5075000, "new", 0),
+    (5100000, "new", 17500),      # marginal relief just above ₹50 lakh
+    (7075000, "new", 168000),     # full 10%
+]
+
+
+@pytest.mark.parametrize("salary, regime, expected", SURCHARGE_CASES)
+def test_surcharge_marginal_relief(salary, regime, expected):
+    result = tax_engine.compute_tax(TaxProfile(salary=salary), regime, "2025-26")
+    assert result.surcharge == pytest.approx(expected)
+
+
+def test_new_regime_surcharge_capped_at_25_percent():
+    result = tax_engine.compute_tax(TaxProfile(other_income=60000000), "new", "2025-26")
+    tax_before_surcharge = result.slab_tax - result.rebate_87a + result.special_rate_tax
+    assert result.surcharge == pytest.approx(tax_before_surcharge * 0.25)
+
+
+# ------------------------------------------------------------------------------
+# Late fee, ITR-U and 115BBH
+# ------------------------------------------------------------------------------
+
+DUE = datetime.date(2026, 7, 31)
+
+# (total income, filed on, fee)
+LATE_FEE_CASES = [
+    (1200000, datetime.date(2026, 7, 31), 0),
+    (400000, datetime.date(2026, 8, 1), 1000),
+    (500000, datetime.date(2026, 12, 31), 1000),
+    (500001, datetime.date(2026, 8, 1), 5000),
+]
+
+
+@pytest.mark.parametrize("income, filed_on, expected", LATE_FEE_CASES)
+def test_late_fee_234f(income, filed_on, expected):
+    assert tax_engine.late_fee_234f(income, filed_on, DUE) == expected
+
+
+# (months since end of AY, additional tax rate)
+ITR_U_CASES = [(1, 0.25), (12, 0.25), (13, 0.50), (24, 0.50), (25, 0.60), (36, 0.60), (37, 0.70), (48, 0.70)]
+
+
+@pytest.mark.parametrize("months, rate", ITR_U_CASES)
+def test_itr_u_additional_tax(months, rate):
+    additional = tax_engine.itr_u_additional_tax(100000, months)
+    assert additional.rate == rate
+    assert additional.amount == 100000 * rate
+
+
+def test_itr_u_window_closes_after_48_months():
+    with pytest.raises(ValueError):
+        tax_engine.itr_u_additional_tax(100000, 49)
+
+
+# (filed on, months since AY 2025-26 ended on 31 Mar 2026)
+MONTHS_CASES = [
+    (datetime.date(2026, 3, 31), 0),
+    (datetime.date(2026, 4, 1), 1),
+    (datetime.date(2027, 3, 31), 12),
+    (datetime.date(2027, 4, 1), 13),
+]
+
+
+@pytest.mark.parametrize("filed_on, expected", MONTHS_CASES)
+def test_months_since_ay_end(filed_on, expected):
+    assert tax_engine.months_since_ay_end(datetime.date(2026, 3, 31), filed_on) == expected
+
+
+# (gains per asset, taxable, tax incl. cess)
+VDA_CASES = [
+    ([300000], 300000, 93600),
+    ([100000, -40000, 50000], 150000, 46800),   # loss on one asset is not set off
+    ([-50000], 0, 0),
+    ([], 0, 0),
+]
+
+
+@pytest.mark.parametrize("gains, taxable, tax", VDA_CASES)
+def test_vda_115bbh(gains, taxable, tax):
+    assert tax_engine.vda_taxable_income(gains) == taxable
+    assert tax_engine.vda_tax_115bbh(gains) == pytest.approx(tax)
+
+
+# (today, expected filing status) for FY 2025-26 and the year after
+FILING_CASES = [
+    (datetime.date(2026, 5, 1), "Normal Filing Window** for FY 2025-26 (ends July 31, 2026)"),
+    (datetime.date(2026, 10, 19), "Belated Filing Window** for FY 2025-26 (ends December 31, 2026)"),
+    (datetime.date(2027, 2, 10), "Window Closed** for FY 2025-26"),
+    (datetime.date(2027, 4, 2), "Normal Filing Window** for FY 2026-27 (ends July 31, 2027)"),
+]
+
+
+@pytest.mark.parametrize("today, status", FILING_CASES)
+def test_get_tax_filing_context(today, status):
+    assert status in tax_engine.get_tax_filing_context(today)
+
+
+# ------------------------------------------------------------------------------
+# ITR form selection
+# ------------------------------------------------------------------------------
+
+ITR_CASES = [
+    ({"salary": 1000000}, "ITR-1"),
+    ({"salary": 1000000, "ltcg_112a": 100000}, "ITR-1"),
+    ({"salary": 1000000, "house_properties": 1}, "ITR-1"),
+    ({"salary": 1000000, "foreign_assets": True}, "ITR-2"),     # Schedule FA
+    ({"salary": 6000000}, "ITR-2"),
+    ({"salary": 1000000, "stcg_111a": 50000}, "ITR-2"),
+    ({"salary": 1000000, "ltcg_112a": 200000}, "ITR-2"),
+    ({"salary": 1000000, "vda_gains": [10000]}, "ITR-2"),
+    ({"salary": 1000000, "house_properties": 2}, "ITR-2"),
+    ({"salary": 1000000, "resident": False}, "ITR-2"),
+    ({"salary": 1000000, "is_director": True}, "ITR-2"),
+    ({"salary": 1000000, "unlisted_shares": True}, "ITR-2"),
+    ({"salary": 1000000, "agricultural_income": 10000}, "ITR-2"),
+    ({"business_income": 800000}, "ITR-3"),
+    ({"salary": 1000000, "business_income": 200000}, "ITR-3"),
+    ({"presumptive_income": 800000}, "ITR-4"),
+    ({"presumptive_income": 800000, "foreign_assets": True}, "ITR-3"),
+    ({"presumptive_income": 800000, "house_properties": 2}, "ITR-3"),   # ITR-4 allows one house
+]
+
+
+@pytest.mark.parametrize("kwargs, form", ITR_CASES)
+def test_select_itr_form(kwargs, form):
+    selection = tax_engine.select_itr_form(TaxProfile(**kwargs))
+    assert selection.form == form
+    assert selection.reasons
+
+
+# ------------------------------------------------------------------------------
+# Regime comparison
+# ------------------------------------------------------------------------------
+
+# (profile, recommended regime, saving)
+BATCH_CASES = [
+    (TaxProfile(salary=1275000), "new", 187200),
+    (TaxProfile(salary=2000000, deductions=800000), "old", 28600),
+    (TaxProfile(salary=5100000), "new", 267800),
+    (TaxProfile(other_income=1000000, age=82), "new", 104000),
+    (TaxProfile(salary=1000000, stcg_111a=200000, ltcg_112a=300000, vda_gains=[50000, -20000]), "new", 72800),
+]
+
+
+def test_compare_regimes_batch():
+    profiles = [profile for profile, _, _ in BATCH_CASES]
+    comparisons = tax_engine.compare_regimes_batch(profiles, "2025-26")
+    assert len(comparisons) == len(BATCH_CASES)
+    for (profile, recommended, saving), comparison in zip(BATCH_CASES, comparisons):
+        assert comparison.old == tax_engine.compute_tax(profile, "old", "2025-26")
+        assert comparison.new == tax_engine.compute_tax(profile, "new", "2025-26")
+        assert (comparison.recommended, comparison.saving) == (recommended, saving)
+
+
+# ------------------------------------------------------------------------------
+# Reading a profile from the question
+# ------------------------------------------------------------------------------
+
+# (question, salary, other income, VDA gains); None = no figures computed
+QUERY_CASES = [
+    ("My salary is 15 lakh, which regime is better?", 1500000, 0, []),
+    ("My salary is 50k per month", 600000, 0, []),
+    ("My monthly salary is Rs 80,000", 960000, 0, []),
+    ("My CTC is 12 LPA, which regime?", 1200000, 0, []),
+    ("I have crypto income of 3 lakh", 0, 0, [300000]),
+    ("salary 12 lakh and crypto gains 2 lakh", 1200000, 0, [200000]),
+    ("salary 12 lakh, home loan EMI 20k per month", 1200000, 0, []),
+    ("My salary is 50k", None, None, None),
+    ("What is section 139(8A)?", None, None, None),
+]
+
+
+@pytest.mark.parametrize("query, salary, other_income, vda_gains", QUERY_CASES)
+def test_profile_from_query(query, salary, other_income, vda_gains):
+    profile = tax_engine.profile_from_query(query)
+    if salary is None:
+        assert profile is None
+        return
+    assert (profile.salary, profile.other_income, profile.vda_gains) == (salary, other_income, vda_gains)
+
+
+# (question, expected TaxProfile fields)
+PROFILE_FIELD_CASES = [
+    ("I made a crypto loss of 3 lakh", {"vda_gains": [-300000], "salary": 0}),
+    ("bitcoin loss of 2 lakh and salary 10 lakh", {"vda_gains": [-200000], "salary": 1000000}),
+    ("short term capital gains of 5 lakh on shares and salary 10 lakh", {"stcg_111a": 500000, "salary": 1000000}),
+    ("LTCG of 3 lakh on mutual funds and salary 15 lakh", {"ltcg_112a": 300000, "salary": 1500000}),
+    ("NRI with income of 6 lakh", {"resident": False, "other_income": 600000}),
+    ("I am 65 years old with pension income of 9 lakh", {"age": 65, "other_income": 900000}),
+    ("senior citizen with income of 8 lakh", {"age": 60}),
+    ("salary 12 lakh, 80C of 2 lakh and home loan interest of 1.5 lakh", {"deductions": 300000}),
+    ("I am 70 years old, income 9 lakh, 80D 40k", {"deductions": 40000}),
+    ("salary 9 lakh, 80D 40k", {"deductions": 25000}),
+]
+
+
+@pytest.mark.parametrize("query, fields", PROFILE_FIELD_CASES)
+def test_profile_fields_from_query(query, fields):
+    profile = tax_engine.profile_from_query(query)
+    assert {name: getattr(profile, name) for name in fields} == fields
+
+
+# Questions stating something the profile cannot represent: no figures at all.
+NO_FIGURES_CASES = [
+    "capital gains of 40 lakh and salary 10 lakh, which ITR form?",
+    "capital gain of 20 lakh on sale of flat, salary 10 lakh",
+    "I have a business loss and income 8 lakh",
+    "I invest in PPF, salary 10 lakh",
+    "salary 10 lakh, I claim HRA of 2 lakh",
+    "salary 10 lakh and 80C",
+]
+
+
+@pytest.mark.parametrize("query", NO_FIGURES_CASES)
+def test_no_figures_for_unplaced_income(query):
+    assert tax_engine.profile_from_query(query) is None
+    assert tax_engine.build_tax_context(query) is None
+
+
+def test_crypto_loss_is_not_taxed_or_set_off():
+    context = tax_engine.build_tax_context("bitcoin loss of 2 lakh and salary 10 lakh", datetime.date(2026, 5, 1))
+    assert "- Gross Income: ₹1,000,000" in context
+    assert "115BBH (30% + cess): ₹0" in context
+    assert "Crypto/VDA Loss ₹200,000: cannot be set off" in context
+
+
+def test_stcg_on_shares_is_taxed_and_needs_itr2():
+    profile = tax_engine.profile_from_query("short term capital gains of 5 lakh on shares and salary 10 lakh")
+    assert tax_engine.compute_tax(profile, "new").special_rate_tax == 100000
+    assert tax_engine.select_itr_form(profile).form == "ITR-2"